@@ -0,0 +1,231 @@
+"""
+사이트 빌드 벤치마크 (오프라인)
+합성 쿠팡 API 응답과 가격 기록을 만들어 빌드 단계별 소요 시간/처리량/최대 메모리를 측정하고,
+저장된 기준값(baseline)과 비교해 성능 저하를 잡아냅니다.
+
+사용법:
+    python benchmark.py --products 10000 --history 48
+    python benchmark.py --products 100000 --save-baseline
+    python benchmark.py --products 100000 --fail-on-regression
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+from make_html import create_product_card, PAGE_REQUIRED_SLOTS, PAGE_OPTIONAL_SLOTS
+from product_table import ProductTable
+from price_store import PriceHistoryStore, write_segment, compact_segments, RetentionPolicy
+from site_build import write_atomic
+from template_renderer import load_template
+
+BASELINE_FILE = 'benchmark_baseline.json'
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'template.html')
+
+CATEGORY_COUNT = 15
+NAME_WORDS = ['무선', '블루투스', '이어폰', '노트북', '유기농', '세럼', '러닝화', '텀블러', '캠핑', '의자',
+              '키보드', '마우스', '선크림', '비타민', '유아', '기저귀', '강아지', '사료', '화분', '차량용']
+
+
+def generate_products(count, seed=42, id_offset=0):
+    """쿠팡 bestcategories/goldbox 응답 형태의 합성 상품 목록 생성 (상품 ID는 id_offset부터)"""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        original_price = rng.randint(5, 500) * 1000
+        sale_price = original_price - rng.randint(0, original_price // 2000) * 1000
+        products.append({
+            'productId': 10_000_000 + id_offset + i,
+            'productName': ' '.join(rng.choice(NAME_WORDS) for _ in range(4)) + f' {i}',
+            'productPrice': sale_price,
+            'originalPrice': original_price,
+            'salePrice': sale_price,
+            'productImage': f'https://thumbnail.coupangcdn.com/thumbnails/remote/230x230ex/image/{i}.jpg',
+            'productUrl': f'https://link.coupang.com/re/AFFSDP?lptag=AF0000000&pageKey={i}',
+            'categoryName': f'카테고리{i % CATEGORY_COUNT}',
+            'isRocket': rng.random() < 0.5,
+        })
+    return products
+
+
+def generate_history(store, products, history_length, seed=42, end_ts=None):
+    """상품마다 history_length개의 시간별 관측값을 가진 가격 기록을 저장소에 채움"""
+    rng = random.Random(seed + 1)
+    if end_ts is None:
+        end_ts = int(time.time()) - 3600
+
+    def grouped():
+        for product in products:
+            price = float(product['salePrice'])
+            observations = []
+            for h in range(history_length):
+                # 대부분의 시간에는 가격이 그대로이고 가끔 바뀜
+                if rng.random() < 0.05:
+                    price = max(1000.0, price + rng.choice((-1, 1)) * 1000)
+                observations.append((end_ts - (history_length - h) * 3600, price))
+            yield str(product['productId']), observations
+
+    store._import_observations(grouped())
+
+
+class StageTimer:
+    """단계별 소요 시간과 tracemalloc 최대 메모리 측정"""
+
+    def __init__(self):
+        self.results = {}
+
+    def run(self, name, items, func, *args, **kwargs):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        self.results[name] = {
+            'seconds': round(elapsed, 4),
+            'items': items,
+            'items_per_sec': round(items / elapsed, 1) if elapsed > 0 else None,
+            'peak_mb': round(peak / (1024 * 1024), 2),
+        }
+        print(f"  {name:<22} {elapsed:8.3f}s  {self.results[name]['items_per_sec'] or 0:>12,.0f}/s  "
+              f"peak {self.results[name]['peak_mb']:8.2f} MB")
+        return result
+
+
+def split_categories(products):
+    """상품을 카테고리 수만큼 나눠 페이지 단위 목록으로 변환"""
+    return [products[i::CATEGORY_COUNT] for i in range(CATEGORY_COUNT)]
+
+
+def run_benchmark(product_count, history_length, include_legacy=True, seed=42):
+    """전체 빌드 단계를 임시 디렉터리에서 실행하고 단계별 결과 반환"""
+    timer = StageTimer()
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'price_history.db')
+        segment_dir = os.path.join(work_dir, 'price_segments')
+        output_dir = os.path.join(work_dir, 'docs')
+
+        print(f"📦 합성 데이터 생성: 상품 {product_count:,}개, 상품당 가격 기록 {history_length}건")
+        products = generate_products(product_count, seed)
+        store = PriceHistoryStore(db_path)
+        timer.run('history_seed', product_count * history_length, generate_history, store, products, history_length, seed)
+        pages = split_categories(products)
+
+        print("⏱ 단계별 측정")
+        # 빌드와 같은 경로: ProductTable.add가 처음 보는 상품의 가격 기록을 저장소에서 읽고 최저가를 갱신
+        db = {}
+        table = ProductTable(store, db)
+        processed_pages = timer.run(
+            'processing', product_count,
+            lambda: [table.by_discount(table.add(page)) for page in pages],
+        )
+        processed_count = sum(len(page) for page in processed_pages)
+
+        card_pages = timer.run(
+            'card_render', processed_count,
+            lambda: [[create_product_card(item, item.get('isAllTimeLow', False)) for item in page]
+                     for page in processed_pages],
+        )
+
+        page_template = load_template(TEMPLATE_FILE, PAGE_REQUIRED_SLOTS, PAGE_OPTIONAL_SLOTS)
+        page_htmls = timer.run(
+            'template_fill', len(card_pages),
+            lambda: [page_template.render(PAGE_TITLE=f"카테고리{i} 핫딜", MAIN_CONTENT="".join(cards))
+                     for i, cards in enumerate(card_pages)],
+        )
+
+        timer.run(
+            'page_write', len(page_htmls),
+            lambda: [write_atomic(os.path.join(output_dir, f"category-{i}.html"), html)
+                     for i, html in enumerate(page_htmls)],
+        )
+
+        def save():
+            write_segment(db, segment_dir=segment_dir, run_id='bench')
+            return compact_segments(store, segment_dir=segment_dir, policy=RetentionPolicy())
+        timer.run('db_save', product_count, save)
+        store.close()
+
+        if include_legacy:
+            from main import HTMLGenerator
+            category_products = {f"카테고리{i}": page for i, page in enumerate(pages[1:], start=1)}
+            timer.run('legacy_generate_html', product_count,
+                      HTMLGenerator.generate_html, pages[0], category_products)
+    tracemalloc.stop()
+    return timer.results
+
+
+def compare_with_baseline(scenario, results, baseline_path=BASELINE_FILE, tolerance=0.25):
+    """기준값 대비 단계별 소요 시간 비교, 허용치를 넘게 느려진 단계 목록 반환"""
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get(scenario)
+    except FileNotFoundError:
+        baseline = None
+    if not baseline:
+        print(f"ℹ 기준값이 없습니다. (--save-baseline으로 {baseline_path}에 저장)")
+        return []
+
+    regressions = []
+    print(f"📊 기준값 비교 ({baseline_path}, 허용치 +{int(tolerance * 100)}%)")
+    for stage, current in results.items():
+        base = baseline.get(stage)
+        if not base or not base.get('seconds'):
+            continue
+        ratio = current['seconds'] / base['seconds']
+        mark = '❌' if ratio > 1 + tolerance else '✓'
+        print(f"  {mark} {stage:<22} {base['seconds']:8.3f}s → {current['seconds']:8.3f}s ({ratio:5.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append(stage)
+    return regressions
+
+
+def save_baseline(scenario, results, baseline_path=BASELINE_FILE):
+    """현재 결과를 시나리오별 기준값으로 저장"""
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        baseline = {}
+    baseline[scenario] = results
+    with open(baseline_path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"💾 기준값 저장: {baseline_path} [{scenario}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="사이트 빌드 단계별 벤치마크 (오프라인)")
+    parser.add_argument('--products', type=int, default=10_000, help="합성 상품 수 (기본 10,000)")
+    parser.add_argument('--history', type=int, default=48, help="상품당 시간별 가격 기록 수 (기본 48)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-legacy', action='store_true', help="main.HTMLGenerator 측정 생략")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="기준값 파일 경로")
+    parser.add_argument('--save-baseline', action='store_true', help="이번 결과를 기준값으로 저장")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="허용 성능 저하 비율 (기본 0.25)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="성능 저하 시 종료 코드 1")
+    parser.add_argument('--json', help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    scenario = f"products={args.products},history={args.history}"
+    results = run_benchmark(args.products, args.history, include_legacy=not args.no_legacy, seed=args.seed)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'scenario': scenario, 'results': results}, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        save_baseline(scenario, results, args.baseline)
+        return
+
+    regressions = compare_with_baseline(scenario, results, args.baseline, args.tolerance)
+    if regressions and args.fail_on_regression:
+        print(f"❌ 성능 저하 단계: {', '.join(regressions)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
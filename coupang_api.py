@@ -8,6 +8,88 @@ import time
 import hmac
 import hashlib
 import sys
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from response_cache import ResponseCache
+from metrics import BuildMetrics
+from json_stream import iter_json_items
+
+# 쿠팡 API 호출 속도 제한 (초당 토큰 충전량 / 최대 버스트)
+API_RATE_PER_SEC = float(os.getenv('COUPANG_API_RATE', '1.0'))
+API_RATE_BURST = int(os.getenv('COUPANG_API_BURST', '3'))
+
+# HTTP 전송 설정 (연결 풀 / 타임아웃 / 재시도)
+POOL_MAXSIZE = 8
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 30.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# 응답 본문 읽기 단위 (바이트) - 이 크기만큼 도착할 때마다 상품을 파싱해 넘김
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 카테고리 베스트 조회 크기 (API 최대 100) / 최대 페이지 수
+# page 파라미터를 지원하는 API에서만 2 이상으로 설정 (기본 1페이지)
+BESTSELLER_LIMIT = int(os.getenv('BESTSELLER_LIMIT', '100'))
+BESTSELLER_MAX_PAGES = int(os.getenv('BESTSELLER_MAX_PAGES', '1'))
+# 스트리밍 응답을 처리 단계로 넘기는 상품 묶음 크기
+BESTSELLER_BATCH_SIZE = int(os.getenv('BESTSELLER_BATCH_SIZE', '25'))
+
+
+class TokenBucket:
+    """
+    스레드 안전 토큰 버킷 속도 제한기
+    여러 워커가 하나의 버킷을 공유하여 전체 호출 속도를 rate(회/초) 이하로 유지
+    """
+
+    def __init__(self, rate=API_RATE_PER_SEC, capacity=API_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 대기"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+    def try_acquire(self):
+        """대기하지 않고 토큰 1개 획득 시도, (성공 여부, 다음 토큰까지 남은 초) 반환"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True, 0.0
+            return False, (1 - self.tokens) / self.rate
+
+
+class ApiRequestError(Exception):
+    """API 요청이 결과 없이 실패함 (strict 조회에서 빈 결과와 구분하기 위해 사용)"""
+
+
+class _Flight:
+    """진행 중인 API 호출 1건 (같은 요청을 기다리는 호출자들이 결과를 공유)"""
+
+    def __init__(self, keep_items):
+        # 응답 캐시가 없을 때만 기다리는 호출자용 상품 복사본을 보관 (캐시가 있으면 캐시에서 재생)
+        self.items = [] if keep_items else None
+        self.complete = False
+        self.done = threading.Event()
+
 
 class CoupangApiHandler:
     """
@@ -15,17 +97,43 @@ class CoupangApiHandler:
     'GET' 방식 + 'Query Parameter'를 포함하는 HMAC 서명 구현
     """
 
-    def __init__(self):
+    def __init__(self, use_cache=True, offline=False, metrics=None):
+        # 오프라인 모드는 캐시만 재생하므로 API 키가 없어도 동작
+        self.offline = offline
         try:
             self.access_key = os.environ['COUPANG_ACCESS_KEY']
             self.secret_key = os.environ['COUPANG_SECRET_KEY']
             self.channel_id = os.environ['COUPANG_CHANNEL_ID']
         except KeyError as e:
-            print(f"❌ 치명적 오류: GitHub Secrets에 {e}가 설정되지 않았습니다.", file=sys.stderr)
-            sys.exit(1)
+            if not offline:
+                print(f"❌ 치명적 오류: GitHub Secrets에 {e}가 설정되지 않았습니다.", file=sys.stderr)
+                sys.exit(1)
+            self.access_key = os.environ.get('COUPANG_ACCESS_KEY', '')
+            self.secret_key = os.environ.get('COUPANG_SECRET_KEY', '')
+            self.channel_id = os.environ.get('COUPANG_CHANNEL_ID', '')
 
-        self.base_url = "https://api-gateway.coupang.com"
-        print("🔑 쿠팡 v1 API 핸들러 초기화 완료 (GET + Query HMAC 기준)")
+        # 로컬 목 서버 등으로 바꿀 수 있도록 환경 변수 우선
+        self.base_url = os.getenv('COUPANG_API_BASE_URL', "https://api-gateway.coupang.com")
+        # API 호출별 지표 (지연 시간/상태/재시도/응답 크기/상품 수)
+        self.metrics = metrics if metrics is not None else BuildMetrics()
+        # 모든 API 호출이 공유하는 속도 제한기 (고정 sleep 대체)
+        self.rate_limiter = TokenBucket()
+        # 동시에 진행 중인 같은 요청(METHOD + PATH + QUERY)은 한 번만 보내고 결과를 공유 (single-flight)
+        self.flights = {}
+        self.flights_lock = threading.Lock()
+        # keep-alive 연결 풀 (호출마다 TCP+TLS 핸드셰이크 반복 방지)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 디스크 응답 캐시 (TTL 내 재실행 시 API 재호출 방지)
+        self.cache = ResponseCache(offline=offline) if (use_cache or offline) else None
+        if self.cache is not None:
+            evicted = self.cache.evict_expired()
+            if evicted:
+                print(f"🧹 만료된 API 캐시 {evicted}개 삭제")
+        print("🔑 쿠팡 v1 API 핸들러 초기화 완료 (GET + Query HMAC 기준)"
+              + (" [오프라인 재생 모드]" if offline else ""))
     
     def _generate_hmac(self, method, path, query):
         """GET 방식 HMAC 서명 생성 (Query 포함)"""
@@ -48,34 +156,203 @@ class CoupangApiHandler:
             f"signature={signature}"
         )
 
-    def _request_api(self, method, path, query):
-        """API 요청 공통 로직"""
+    def _retry_wait(self, attempt, response=None):
+        """재시도 대기 시간 계산 (지수 백오프 + 지터, Retry-After 헤더 우선)"""
+        backoff = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = 0
+            return min(BACKOFF_MAX, max(delay, backoff))
+        return backoff
+
+    def _send(self, method, path, query, call=None, stream=False):
+        """
+        HMAC 서명 + 연결 풀 + 타임아웃 + 재시도를 적용한 전송 계층
+        429/5xx 및 연결 오류는 MAX_RETRIES까지 재시도하고, 최종 실패 시 예외 발생
+        call(지표 기록용 딕셔너리)이 주어지면 상태 코드/재시도 횟수/응답 크기/대기 시간을 채움
+        stream=True면 본문을 미리 받지 않음 (호출 측에서 iter_content로 읽고 close)
+        """
+        if call is None:
+            call = {}
+        url = f"{self.base_url}{path}?{query}"
+        attempt = 0
+        while True:
+            # 재시도마다 서명 시각이 바뀌므로 헤더를 새로 생성
+            headers = {"Authorization": self._generate_hmac(method, path, query)}
+            queued_at = time.perf_counter()
+            self.rate_limiter.acquire()
+            # 지연 시간은 속도 제한 대기 이후 마지막 시도의 요청~응답 시간 (대기/백오프는 따로 기록)
+            call['_start'] = time.perf_counter()
+            call['queue_ms'] = round(call.get('queue_ms', 0) + (call['_start'] - queued_at) * 1000, 1)
+            try:
+                response = self.session.request(method, url, headers=headers, stream=stream,
+                                                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= MAX_RETRIES:
+                    raise
+                wait_time = self._retry_wait(attempt)
+                attempt += 1
+                call['retries'] = attempt
+                print(f"   ⚠ {type(e).__name__} 발생. {wait_time:.1f}초 후 재시도 ({attempt}/{MAX_RETRIES}) - {path}")
+                call['backoff_ms'] = round(call.get('backoff_ms', 0) + wait_time * 1000, 1)
+                time.sleep(wait_time)
+                continue
+
+            call['status'] = response.status_code
+            if response.status_code in RETRY_STATUS_CODES and attempt < MAX_RETRIES:
+                wait_time = self._retry_wait(attempt, response)
+                attempt += 1
+                call['retries'] = attempt
+                print(f"   ⚠ {response.status_code} 응답. {wait_time:.1f}초 후 재시도 ({attempt}/{MAX_RETRIES}) - {path}")
+                response.close()
+                call['backoff_ms'] = round(call.get('backoff_ms', 0) + wait_time * 1000, 1)
+                time.sleep(wait_time)
+                continue
+
+            if not stream:
+                call['bytes'] = len(response.content)
+            response.raise_for_status() # 200번대가 아니면 오류 발생
+            return response
+
+    def _read_body(self, response, writer, call):
+        """응답 본문을 조각 단위로 읽으며 캐시 파일에도 이어 쓰고 크기를 기록"""
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            call['bytes'] += len(chunk)
+            if writer is not None:
+                writer.write(chunk)
+            yield chunk
+        # 지연 시간은 본문 수신 완료 시점까지 (앞서 넘긴 상품의 처리 시간이 겹쳐 포함될 수 있음)
+        call['latency_ms'] = round((time.perf_counter() - call['_start']) * 1000, 1)
+
+    def _iter_api_items(self, method, path, query):
+        """
+        API 요청 공통 로직 (스트리밍)
+        응답 본문을 조각 단위로 읽으면서 'data' 배열의 상품을 도착하는 대로 하나씩 반환
+        전체 응답 객체를 만들지 않으므로 전송과 처리가 겹치고 큰 응답도 메모리 사용량이 일정
+        첫 상품 전에 실패하면 상품 없이 끝나고(False 반환), 상품을 넘긴 뒤 실패하면 예외를 그대로 전달
+        """
+        call = self.metrics.new_api_call(method, path)
+        call['items'] = 0
         try:
-            authorization = self._generate_hmac(method, path, query)
-            headers = {"Authorization": authorization}
-            url = f"{self.base_url}{path}?{query}"
+            if self.cache is not None:
+                cached_items = self.cache.open_items(method, path, query)
+                if cached_items is not None:
+                    print(f"💾 캐시 응답 사용 (Path: {path})")
+                    call['cache'] = 'hit'
+                    for item in cached_items:
+                        call['items'] += 1
+                        yield item
+                    return True
+                if self.offline:
+                    print(f"⚠ 오프라인 모드: 캐시에 없는 응답입니다. (Path: {path})", file=sys.stderr)
+                    call['cache'] = 'offline-miss'
+                    call['error'] = 'offline-miss'
+                    return False
 
             print(f"🚀 {method} API 호출 시작 (Path: {path})")
             print(f"   Query: {query}")
             
-            response = requests.get(url, headers=headers)
-            response.raise_for_status() # 200번대가 아니면 오류 발생
-            
-            result_json = response.json()
-            print("✅ API 호출 성공! 상품 데이터를 반환합니다.")
-            
-            # v1 API는 응답 구조가 'data' 키 안에 상품 리스트가 있음
-            return result_json.get('data', [])
+            response = self._send(method, path, query, call, stream=True)
+            # 본문은 받는 대로 캐시 파일에 이어 쓰고, 끝까지 파싱된 경우에만 캐시로 확정
+            writer = self.cache.open_writer(method, path, query) if self.cache is not None else None
+            try:
+                # v1 API는 응답 구조가 'data' 키 안에 상품 리스트가 있음
+                for item in iter_json_items(self._read_body(response, writer, call), ('data',)):
+                    call['items'] += 1
+                    yield item
+                if writer is not None:
+                    writer.commit()
+            finally:
+                if writer is not None:
+                    writer.discard()
+                response.close()
+            print(f"✅ API 호출 성공! 상품 {call['items']}개를 받았습니다.")
 
         except requests.exceptions.RequestException as e:
             print(f"❌ API 호출 실패: {e}", file=sys.stderr)
+            call['error'] = type(e).__name__
             if hasattr(e, 'response') and e.response is not None:
                 print(f"    - 상태 코드: {e.response.status_code}", file=sys.stderr)
                 print(f"    - 응답 내용: {e.response.text}", file=sys.stderr)
-            return [] # 실패 시 빈 리스트 반환
+            # 상품을 일부 넘긴 뒤 끊긴 응답은 빈 결과로 끝내면 잘린 목록이 정상 결과처럼 쓰이므로 호출 측에 전달
+            if call['items']:
+                raise
         except Exception as e:
             print(f"❌ 예상치 못한 오류: {e}", file=sys.stderr)
-            return []
+            call['error'] = type(e).__name__
+            if call['items']:
+                raise
+        finally:
+            self.metrics.record_api_call(call)
+        return call['error'] is None
+
+    def _fetch_items(self, method, path, query, strict=False):
+        """
+        single-flight 적용 상품 스트림
+        같은 요청이 이미 진행 중이면 끝날 때까지 기다렸다가 그 결과를 받음
+        - 응답 캐시를 쓰면 앞선 요청이 확정한 캐시 항목을 재생하므로 상품을 따로 보관하지 않음
+        - 캐시가 없으면 (--no-cache) 처음 요청한 호출자가 진행 중에만 원본 상품 복사본을 모아 둠
+          (호출 측이 상품 딕셔너리를 고쳐 쓰므로 복사본으로 전달)
+        요청이 끝나면 공유 대상에서 바로 빠지므로 결과가 빌드 내내 메모리에 남지 않음 (이후 호출은 응답 캐시 사용)
+        실패했거나 끝까지 읽지 않은 요청은 공유하지 않고 기다리던 호출자가 다시 요청
+        strict=True면 실패한 요청을 빈 결과로 끝내지 않고 ApiRequestError 발생
+        """
+        key = (method, path, query)
+        with self.flights_lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight(keep_items=self.cache is None)
+        
+        if not leader:
+            flight.done.wait()
+            if flight.complete and flight.items is not None:
+                call = self.metrics.new_api_call(method, path)
+                call['cache'] = 'coalesced'
+                call['items'] = len(flight.items)
+                self.metrics.record_api_call(call)
+                print(f"🔁 같은 빌드의 응답 재사용 (Path: {path})")
+                for item in flight.items:
+                    yield dict(item)
+                return
+            # 앞선 요청이 성공했으면 응답 캐시에서 재생, 실패했으면 직접 요청 (이번 요청이 새 공유 대상이 됨)
+            yield from self._fetch_items(method, path, query, strict)
+            return
+        
+        items = self._iter_api_items(method, path, query)
+        try:
+            while True:
+                try:
+                    item = next(items)
+                except StopIteration as stop:
+                    flight.complete = bool(stop.value)
+                    break
+                if flight.items is not None:
+                    flight.items.append(dict(item))
+                yield item
+        finally:
+            items.close()
+            if not flight.complete:
+                flight.items = None
+            # 이후 호출은 응답 캐시로 (복사본은 기다리던 호출자가 다 받으면 함께 해제)
+            with self.flights_lock:
+                self.flights.pop(key, None)
+            flight.done.set()
+        if strict and not flight.complete:
+            raise ApiRequestError(f"{method} {path} 요청 실패")
+
+    def _request_api(self, method, path, query):
+        """
+        API 요청 공통 로직 (상품 리스트 반환)
+        첫 상품 전에 실패하면 빈 리스트, 상품을 받은 뒤 본문이 끊기면 예외 발생 (호출 측에서 처리)
+        """
+        return list(self._fetch_items(method, path, query))
 
     def get_goldbox_products(self):
         """v1 골드박스 API 호출"""
@@ -85,13 +362,50 @@ class CoupangApiHandler:
         
         return self._request_api(METHOD, PATH, QUERY)
     
-    def get_bestseller_products(self, category_id="1001"):
-        """v1 베스트셀러 API 호출 (카테고리 ID 1001 = 패션의류/잡화)"""
+    def _bestseller_request(self, category_id, limit=None, page=None):
+        """베스트셀러 API 요청 (METHOD, PATH, QUERY)"""
         METHOD = "GET"
         PATH = f"/v2/providers/affiliate_open_api/apis/openapi/v1/products/bestcategories/{category_id}"
         QUERY = f"subId={self.channel_id}" # subId 쿼리 추가
-        
-        return self._request_api(METHOD, PATH, QUERY)
+        if limit:
+            QUERY += f"&limit={limit}"
+        if page and page > 1:
+            QUERY += f"&page={page}"
+        return METHOD, PATH, QUERY
+    
+    def get_bestseller_products(self, category_id="1001", limit=None, page=None):
+        """v1 베스트셀러 API 호출 (카테고리 ID 1001 = 패션의류/잡화)"""
+        return self._request_api(*self._bestseller_request(category_id, limit, page))
+    
+    def iter_bestseller_pages(self, category_id, limit=BESTSELLER_LIMIT, max_pages=BESTSELLER_MAX_PAGES,
+                              batch_size=BESTSELLER_BATCH_SIZE):
+        """
+        카테고리 베스트 상품을 batch_size개씩 묶어 도착하는 대로 내보내는 제너레이터
+        응답 본문을 다 받기 전에 앞쪽 상품부터 처리 단계로 넘어감
+        응답이 limit보다 짧거나 새 상품이 없으면 (page 파라미터를 무시하는 API) 중단
+        요청이 실패하거나 본문이 중간에 끊기면 예외 발생 (호출 측이 카테고리를 실패로 처리하고 지난 페이지 유지)
+        """
+        seen_ids = set()
+        for page in range(1, max_pages + 1):
+            received = 0
+            new_count = 0
+            batch = []
+            # 실패한 요청을 '상품 없음'으로 처리하면 빈/잘린 목록이 정상 결과로 발행되므로 strict 조회
+            for item in self._fetch_items(*self._bestseller_request(category_id, limit, page), strict=True):
+                received += 1
+                product_id = item.get('productId')
+                if product_id in seen_ids:
+                    continue
+                seen_ids.add(product_id)
+                new_count += 1
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            if not new_count or received < limit:
+                return
     
     def get_special_event_list(self):
         """기획전 목록 조회 API"""
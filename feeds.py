@@ -0,0 +1,166 @@
+"""
+기계가 읽을 수 있는 상품 피드
+골드박스/카테고리별 상품을 docs/feeds/{이름}.json으로 내보내고, 실행마다 지난 빌드 대비
+추가/삭제/가격 변경된 상품만 담은 변경분(delta) 파일을 남깁니다.
+소비 측(가격 알림 봇 등)은 feeds/index.json만 주기적으로 확인하고 새 변경분 파일만 읽으면 됩니다.
+"""
+import os
+import json
+from datetime import datetime, timezone
+
+from site_build import write_atomic
+
+# docs/ 아래 피드 디렉터리
+FEED_DIR = 'feeds'
+# 보관할 변경분 파일 수 (1시간마다 실행 기준 이틀)
+DELTA_KEEP = int(os.getenv('FEED_DELTA_KEEP', '48'))
+# 피드 형식 버전
+FEED_VERSION = 1
+
+# 피드 행 필드 (products 배열의 각 행은 이 순서의 값 목록)
+FEED_FIELDS = ('productId', 'productName', 'salePrice', 'originalPrice', 'discountRate',
+               'isAllTimeLow', 'productUrl', 'productImage')
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def feed_row(record):
+    """상품 레코드 → 피드 행"""
+    return [record.get(field) for field in FEED_FIELDS]
+
+
+def load_feed_state(output_dir):
+    """
+    지난 빌드가 발행한 피드 상태 (index.json + 피드 파일) 읽기
+    반환: (index 딕셔너리, {피드 이름: {상품 ID: 피드 행}})
+    """
+    feed_dir = os.path.join(output_dir, FEED_DIR)
+    try:
+        with open(os.path.join(feed_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}, {}
+
+    feeds = {}
+    for name in index.get('feeds', {}):
+        try:
+            with open(os.path.join(feed_dir, f"{name}.json"), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            continue
+        fields = data.get('fields', FEED_FIELDS)
+        feeds[name] = {str(row[0]): dict(zip(fields, row)) for row in data.get('products', [])}
+    return index, feeds
+
+
+def compute_delta(previous, current):
+    """
+    {상품 ID: 행 딕셔너리} 두 상태의 차이
+    반환: (추가된 ID 목록, 삭제된 ID 목록, 가격이 바뀐 ID 목록) - 각각 ID 정렬
+    """
+    added = sorted(pid for pid in current if pid not in previous)
+    removed = sorted(pid for pid in previous if pid not in current)
+    repriced = sorted(pid for pid in current
+                      if pid in previous and previous[pid].get('salePrice') != current[pid].get('salePrice'))
+    return added, removed, repriced
+
+
+def write_feeds(output_dir, sections, manifest, known_feeds=None, now=None, record_delta=True):
+    """
+    피드와 이번 실행의 변경분 저장 후 통계 반환
+    sections: {피드 이름: (제목, 상품 레코드 목록)}
+    known_feeds: 이번 실행에서 조회 실패한 피드는 지난 피드를 그대로 유지 (일시적 API 실패가
+                 '전부 삭제 → 전부 추가' 변경분으로 보이지 않도록). 목록에 없는 옛 피드는 폐기
+    record_delta: False면 변경분 파일을 남기지 않고 지난 변경분 목록을 그대로 둠 (오프라인 재생용)
+    """
+    now = now or datetime.now(timezone.utc)
+    stamp = now.strftime('%Y%m%dT%H%M%SZ')
+    feed_dir = os.path.join(output_dir, FEED_DIR)
+    previous_index, previous_feeds = load_feed_state(output_dir)
+
+    feeds_meta = {}
+    current = {}
+    stats = {'feeds': 0, 'written': 0, 'unchanged': 0, 'carried_over': 0}
+    for name, (title, records) in sections.items():
+        content = _dump({
+            'version': FEED_VERSION, 'feed': name, 'title': title,
+            'fields': FEED_FIELDS, 'products': [feed_row(record) for record in records],
+        })
+        if manifest.write_page(os.path.join(feed_dir, f"{name}.json"), content):
+            stats['written'] += 1
+        else:
+            stats['unchanged'] += 1
+        feeds_meta[name] = {'title': title, 'count': len(records), 'url': f"{FEED_DIR}/{name}.json"}
+        for record in records:
+            row = dict(zip(FEED_FIELDS, feed_row(record)))
+            current.setdefault(str(record.get('productId')), row).setdefault('feeds', []).append(name)
+
+    for name, products in previous_feeds.items():
+        if name in sections or (known_feeds is not None and name not in known_feeds):
+            continue
+        feeds_meta[name] = previous_index['feeds'][name]
+        stats['carried_over'] += 1
+        for pid, row in products.items():
+            current.setdefault(pid, dict(row)).setdefault('feeds', []).append(name)
+    stats['feeds'] = len(feeds_meta)
+
+    previous = {}
+    for name, products in previous_feeds.items():
+        previous.update(products)
+    added, removed, repriced = compute_delta(previous, current)
+
+    # 변경분 파일 (변경이 없어도 실행마다 남겨 소비 측이 빌드 진행 여부를 알 수 있게 함)
+    deltas = previous_index.get('deltas', [])
+    if record_delta:
+        runs = {entry.get('run') for entry in deltas}
+        if stamp in runs:
+            # 같은 초에 두 번 빌드한 경우 (수동 실행 등) 이전 변경분을 덮어쓰지 않도록 구분
+            suffix = 2
+            while f"{stamp}-{suffix}" in runs:
+                suffix += 1
+            stamp = f"{stamp}-{suffix}"
+        delta_name = f"deltas/{stamp}.json"
+        write_atomic(os.path.join(feed_dir, delta_name), _dump({
+            'version': FEED_VERSION,
+            'run': stamp,
+            'previous_run': deltas[0]['run'] if deltas else None,
+            # 이전 피드가 없으면 전체 상품이 추가로 잡히므로 기준점(baseline)으로 표시
+            'baseline': not previous_feeds,
+            'added': [current[pid] for pid in added],
+            'removed': [previous[pid].get('productId') for pid in removed],
+            'repriced': [{'productId': current[pid].get('productId'), 'from': previous[pid].get('salePrice'),
+                          'to': current[pid].get('salePrice'), 'feeds': current[pid]['feeds']}
+                         for pid in repriced],
+        }))
+        deltas.insert(0, {'run': stamp, 'url': f"{FEED_DIR}/{delta_name}",
+                          'added': len(added), 'removed': len(removed), 'repriced': len(repriced)})
+
+        # 오래된 변경분 정리
+        for entry in deltas[DELTA_KEEP:]:
+            try:
+                os.remove(os.path.join(output_dir, entry['url']))
+            except FileNotFoundError:
+                pass
+        deltas = deltas[:DELTA_KEEP]
+
+    # 더 이상 발행하지 않는 피드 파일 삭제
+    for name in previous_feeds:
+        if name not in feeds_meta:
+            try:
+                os.remove(os.path.join(feed_dir, f"{name}.json"))
+            except FileNotFoundError:
+                pass
+
+    # 변경분을 남기지 않은 실행은 생성 시각/실행 ID도 마지막 발행 실행 값 유지
+    published = {'generated_at': now.isoformat(), 'run_id': os.getenv('GITHUB_RUN_ID')} if record_delta else previous_index
+    write_atomic(os.path.join(feed_dir, 'index.json'), _dump({
+        'version': FEED_VERSION,
+        'generated_at': published.get('generated_at'),
+        'run_id': published.get('run_id'),
+        'feeds': feeds_meta,
+        'deltas': deltas,
+    }))
+    stats.update({'added': len(added), 'removed': len(removed), 'repriced': len(repriced)})
+    return stats
@@ -0,0 +1,125 @@
+"""
+증분 JSON 파서
+응답 본문을 조각(chunk) 단위로 받으면서 지정한 경로의 배열 항목만 하나씩 꺼냅니다.
+전체 객체 트리를 만들지 않으므로 큰 응답도 전송이 끝나기 전에 처리를 시작할 수 있습니다.
+
+    for item in iter_json_items(response.iter_content(65536), ('data',)):
+        ...
+"""
+import json
+import codecs
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+# 숫자 뒤에 이어질 수 있는 문자 (바로 뒤가 이 문자면 숫자가 조각 경계에서 잘렸을 수 있음)
+_NUMBER_CONTINUATION = '0123456789.eE+-'
+
+
+class _ChunkReader:
+    """바이트/문자열 조각을 이어 붙이며 앞에서부터 소비하는 버퍼"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+
+    def _fill(self):
+        """조각 하나를 더 읽어 버퍼에 추가, 더 읽을 것이 없으면 False"""
+        if self.exhausted:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            text = self.decoder.decode(b'', final=True)
+        else:
+            text = self.decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        # 이미 소비한 앞부분은 버려 버퍼가 응답 전체로 커지지 않도록 함
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """공백을 건너뛴 다음 문자 (끝이면 '')"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"'{char}' expected", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self):
+        """다음 JSON 값 1개를 디코딩 (버퍼에서 잘린 값이면 조각을 더 읽어 재시도)"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+                # 버퍼 끝에서 끝난 숫자/리터럴은 뒤가 잘렸을 수 있으므로 다음 조각 확인
+                # ('1.' + '5'처럼 소수점/지수 앞에서 잘린 숫자는 raw_decode가 앞부분(1)만 읽고 멈춤)
+                truncated = end == len(self.buffer) or (
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and self.buffer[end] in _NUMBER_CONTINUATION
+                )
+                if not truncated or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._fill()
+
+
+def _iter_array(reader):
+    reader.expect('[')
+    while True:
+        char = reader.peek()
+        if char == ']':
+            reader.pos += 1
+            return
+        if char == ',':
+            reader.pos += 1
+            continue
+        yield reader.value()
+
+
+def _iter_object(reader, path, meta):
+    reader.expect('{')
+    while True:
+        char = reader.peek()
+        if char == '}':
+            reader.pos += 1
+            return
+        if char == ',':
+            reader.pos += 1
+            continue
+        key = reader.value()
+        reader.expect(':')
+        char = reader.peek()
+        if path and key == path[0]:
+            if len(path) == 1 and char == '[':
+                yield from _iter_array(reader)
+                continue
+            if len(path) > 1 and char == '{':
+                yield from _iter_object(reader, path[1:], meta)
+                continue
+        value = reader.value()
+        if meta is not None:
+            meta[key] = value
+
+
+def iter_json_items(chunks, path=('data',), meta=None):
+    """
+    JSON 객체에서 path 경로에 있는 배열의 항목을 도착하는 대로 반환하는 제너레이터
+    경로 밖의 값(rCode 등)은 meta 딕셔너리에 담김 (경로보다 앞에 있는 값은 첫 항목 전에 채워짐)
+    """
+    reader = _ChunkReader(chunks)
+    yield from _iter_object(reader, tuple(path), meta)
+    if reader.peek() != '':
+        raise json.JSONDecodeError("Extra data", reader.buffer, reader.pos)
@@ -0,0 +1,51 @@
+// 카테고리 페이지 나머지 상품 지연 로딩
+// 첫 화면 카드만 HTML에 들어 있고, 나머지는 chunks/{slug}-{n}.json (카드 HTML 조각)으로 나눠져 있음
+(function () {
+    'use strict';
+
+    function init() {
+        var grid = document.getElementById('product-grid');
+        var more = document.getElementById('load-more');
+        if (!grid || !more) {
+            return;
+        }
+        var loading = false;
+
+        function loadNext() {
+            var next = grid.getAttribute('data-next');
+            if (loading || !next) {
+                return;
+            }
+            loading = true;
+            fetch(next).then(function (response) {
+                if (!response.ok) {
+                    throw new Error(response.status);
+                }
+                return response.json();
+            }).then(function (chunk) {
+                grid.insertAdjacentHTML('beforeend', chunk.cards);
+                if (chunk.next) {
+                    grid.setAttribute('data-next', chunk.next);
+                } else {
+                    grid.removeAttribute('data-next');
+                    more.style.display = 'none';
+                }
+                loading = false;
+            }).catch(function () {
+                // 실패하면 버튼으로 다시 시도할 수 있게 둠
+                loading = false;
+            });
+        }
+
+        more.querySelector('button').addEventListener('click', loadNext);
+        if ('IntersectionObserver' in window) {
+            new IntersectionObserver(function (entries) {
+                if (entries[0].isIntersecting) {
+                    loadNext();
+                }
+            }, {rootMargin: '600px'}).observe(more);
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', init);
+})();
@@ -3,27 +3,85 @@ import os
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 load_dotenv(dotenv_path=dotenv_path)
 from datetime import datetime, timedelta
+import re
 import sys
-import time
 import json
-import requests
-from coupang_api import CoupangApiHandler # v1 핸들러 임포트
+import time
+import inspect
+import queue
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from coupang_api import CoupangApiHandler, BESTSELLER_LIMIT # v1 핸들러 임포트
+from site_build import BuildManifest, hash_inputs
+from template_renderer import load_template
+from metrics import BuildMetrics
+from price_store import open_price_store, write_segment, compact_segments, RetentionPolicy, DB_FILE
+from product_table import ProductTable
+from search_index import write_search_index
+from feeds import write_feeds, load_feed_state
+from run_snapshot import build_snapshot, load_snapshot, save_snapshot, diff_snapshots
+from refresh_schedule import RefreshScheduler
 
-# 가격 기록 DB 파일
-DB_FILE = 'price_history.json'
+# template.html 슬롯 (필수 / 선택 - 선택 슬롯은 템플릿에 없어도 됨)
+PAGE_REQUIRED_SLOTS = ('PAGE_TITLE', 'MAIN_CONTENT')
+PAGE_OPTIONAL_SLOTS = ('UPDATE_TIME', 'GOLDBOX_CARDS', 'RECOMMENDATION_CARDS')
 
-def load_price_db():
-    """가격 기록 DB 로드"""
-    try:
-        with open(DB_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+# 카테고리 동시 조회 워커 수 (전체 호출 속도는 API 핸들러의 토큰 버킷이 제한)
+MAX_FETCH_WORKERS = int(os.getenv('FETCH_WORKERS', '4'))
+# 상세 페이지 렌더링/저장 워커 수
+MAX_RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', '4'))
+# 카테고리 페이지의 첫 화면 카드 수 (나머지는 같은 크기의 JSON 조각으로 나눠 스크롤 시 로드)
+CATEGORY_PAGE_SIZE = int(os.getenv('CATEGORY_PAGE_SIZE', '40'))
+# 카테고리 상품 조각 디렉터리 (docs/ 기준)
+CHUNK_DIR = 'chunks'
+# 메인 페이지 '방금 가격 내린 상품' 섹션 카드 수
+JUST_DROPPED_LIMIT = int(os.getenv('JUST_DROPPED_LIMIT', '10'))
+# 실행당 상품을 조회할 최대 기획전 수 (목록 순서대로, 나머지는 지난 빌드 페이지 유지)
+EVENT_MAX_COUNT = int(os.getenv('EVENT_MAX_COUNT', '20'))
+# 기획전 상품 조회 시간 예산 (초) - 넘으면 남은 기획전은 조회를 시작하지 않음
+EVENT_BUDGET_SECONDS = float(os.getenv('EVENT_BUDGET_SECONDS', '60'))
+
+# 카테고리 맵 (카테고리 ID → (이름, 페이지 슬러그))
+ALL_CATEGORIES = {
+    '1016': ('가전/디지털', 'digital'),
+    '1024': ('헬스/건강식품', 'health'),
+    '1001': ('여성패션', 'womens-fashion'),
+    '1002': ('남성패션', 'mens-fashion'),
+    '1003': ('화장품', 'beauty'),
+    '1004': ('식품', 'food'),
+    '1005': ('생활용품', 'home'),
+    '1006': ('도서', 'books'),
+    '1007': ('스포츠', 'sports'),
+    '1008': ('완구', 'toys'),
+    '1009': ('반려동물', 'pets'),
+    '1010': ('출산/유아동', 'baby'),
+    '1011': ('식물', 'plants'),
+    '1012': ('자동차', 'automotive'),
+    '1013': ('기타', 'others')
+}
+
+# 메인 페이지에 미리보기 섹션을 싣는 카테고리 (첫 번째는 베스트셀러 섹션에도 사용)
+TOP_CATEGORIES = {
+    '1016': ('가전/디지털', 'digital'),
+    '1024': ('헬스/건강식품', 'health'),
+    '1001': ('여성패션', 'womens-fashion'),
+    '1003': ('화장품', 'beauty'),
+    '1004': ('식품', 'food')
+}
+
+def copy_static_asset(manifest, output_dir, name):
+    """저장소 루트의 정적 파일(js 등)을 docs/로 복사 (내용이 같으면 쓰지 않음)"""
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), 'r', encoding='utf-8') as f:
+        manifest.write_page(os.path.join(output_dir, name), f.read())
 
-def save_price_db(db):
-    """가격 기록 DB 저장"""
-    with open(DB_FILE, 'w', encoding='utf-8') as f:
-        json.dump(db, f, indent=4, ensure_ascii=False)
+def save_price_db(store, db):
+    """
+    이번 실행에서 관측한 가격을 실행별 세그먼트 파일로 남긴 뒤 저장소에 병합
+    겹쳐 실행된 워크플로도 각자 다른 세그먼트만 추가하므로 서로의 기록을 덮어쓰지 않음
+    """
+    segment_path = write_segment(db)
+    report = compact_segments(store, policy=RetentionPolicy())
+    report['segment_path'] = segment_path
+    return report
 
 def create_product_card(item, is_all_time_low=False):
     """쿠팡 API 응답(item)으로 HTML 카드 1개를 생성"""
@@ -71,360 +129,708 @@ def create_product_card(item, is_all_time_low=False):
     </div>
     """
 
-def process_products(product_list, db=None):
-    """상품 리스트를 처리하여 할인율 계산 및 필터링, 역대 최저가 기록"""
-    if db is None:
-        db = {}
+def render_cards(items):
+    """상품 레코드 목록 → 카드 HTML (역대 최저가 여부는 레코드의 isAllTimeLow 사용)"""
+    return "".join([create_product_card(item, item.get('isAllTimeLow', False)) for item in items])
+
+def kst_now_text():
+    """페이지에 표시할 현재 시각 (한국 시간)"""
+    return (datetime.utcnow() + timedelta(hours=9)).strftime('%Y년 %m월 %d일 %H시 %M분')
+
+def chunk_json(cards_html, next_name):
+    """카테고리 상품 조각 1개 (카드 HTML + 다음 조각 경로)"""
+    return json.dumps({'cards': cards_html, 'next': next_name}, ensure_ascii=False, separators=(',', ':'))
+
+def category_page_html(page_template, category_name, first_page_html, more_count, next_chunk, update_time):
+    """카테고리/기획전 상세 페이지 HTML (첫 화면 카드 + 나머지 조각 지연 로딩)"""
+    load_more_html = ""
+    if next_chunk:
+        load_more_html = f"""
+            <div id="load-more" style="text-align: center; margin-top: 20px;">
+                <button type="button" style="padding: 10px 20px; background-color: #FF416C; color: white; border: none; border-radius: 5px; font-weight: bold; cursor: pointer;">상품 더 보기 ({more_count}개)</button>
+            </div>
+            <script src="lazy_cards.js" defer></script>"""
     
-    processed_items = []
-    for item in product_list:
-        # API 응답 필드명이 다를 수 있으므로 여러 필드명 시도
-        original_price = item.get('originalPrice', 0) or item.get('productPrice', 0) or 0
-        sale_price = item.get('salePrice', 0) or item.get('productPrice', 0) or 0
-        
-        # 숫자로 변환 시도
-        try:
-            original_price = float(original_price) if original_price else 0
-            sale_price = float(sale_price) if sale_price else 0
-        except (ValueError, TypeError):
-            original_price = 0
-            sale_price = 0
-        
-        # originalPrice가 0이거나 salePrice보다 낮으면 제외
-        # 단, originalPrice가 없고 salePrice만 있는 경우는 허용 (할인율 계산 없이)
-        if original_price <= 0:
-            # originalPrice가 없으면 salePrice를 originalPrice로 사용
-            if sale_price > 0:
-                original_price = sale_price
-            else:
+    return page_template.render(
+        PAGE_TITLE=f"{category_name} 핫딜",
+        UPDATE_TIME=f"{update_time} 기준",
+        MAIN_CONTENT=f"""
+        <div class="category-detail-section">
+            <h2 class="section-title">{category_name} 핫딜</h2>
+            <div class="grid-container" id="product-grid"{f' data-next="{next_chunk}"' if next_chunk else ''}>
+                {first_page_html}
+            </div>{load_more_html}
+        </div>
+""",
+    )
+
+def hub_link_html(slug, name):
+    """허브 페이지의 상세 페이지 링크 1개"""
+    return f'<a href="{slug}.html" class="category-link">{name}</a>\n        '
+
+def hub_page_html(page_template, title, heading, links_html, update_time):
+    """링크 목록 허브 페이지 HTML (category.html / events.html)"""
+    return page_template.render(
+        PAGE_TITLE=title,
+        UPDATE_TIME=f"{update_time} 기준",
+        MAIN_CONTENT=f"""
+        <div class="category-hub-section">
+            <h2 class="section-title">{heading}</h2>
+            <div style="display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 15px; margin-top: 20px;">
+                {links_html}
+            </div>
+        </div>
+""",
+    )
+
+def category_section_html(category_name, category_slug, preview_html):
+    """메인 페이지의 카테고리 미리보기 섹션"""
+    return f"""
+        <div class="category-section">
+            <h2 class="section-title" style="margin-top: 40px;">🔥 {category_name} 핫딜</h2>
+            <div class="grid-container">
+                {preview_html}
+            </div>
+            <div style="text-align: center; margin-top: 20px;">
+                <a href="{category_slug}.html" style="display: inline-block; padding: 10px 20px; background-color: #FF416C; color: white; text-decoration: none; border-radius: 5px; font-weight: bold;">더보기 →</a>
+            </div>
+        </div>
+"""
+
+def index_page_html(page_template, update_time, goldbox_html, just_dropped_html, bestseller_html, sections_html):
+    """메인 페이지 HTML (골드박스 → 방금 가격 내린 상품 → 베스트셀러 → TOP 5 카테고리, 빈 섹션은 생략)"""
+    main_content = ""
+    
+    # 골드박스 섹션
+    if goldbox_html:
+        main_content += f"""
+        <div class="goldbox-section">
+            <h2 class="section-title">✨ 골드박스 특가</h2>
+            <div class="grid-container">
+                {goldbox_html}
+            </div>
+        </div>
+"""
+    
+    # 방금 가격 내린 상품 섹션 (지난 실행 대비 인하율 순)
+    if just_dropped_html:
+        main_content += f"""
+        <div class="just-dropped-section">
+            <h2 class="section-title" style="margin-top: 40px;">📉 방금 가격 내린 상품</h2>
+            <div class="grid-container">
+                {just_dropped_html}
+            </div>
+        </div>
+"""
+    
+    # 베스트셀러 섹션
+    if bestseller_html:
+        main_content += f"""
+        <div class="bestseller-section">
+            <h2 class="section-title" style="margin-top: 40px;">🔥 베스트셀러</h2>
+            <div class="grid-container">
+                {bestseller_html}
+            </div>
+        </div>
+"""
+    
+    # TOP 5 카테고리 섹션
+    main_content += sections_html
+    
+    return page_template.render(
+        PAGE_TITLE="쿠팡 실시간 핫딜",
+        UPDATE_TIME=f"{update_time} 기준",
+        MAIN_CONTENT=main_content,
+    )
+
+def search_page_html(page_template):
+    """상품 검색 페이지 HTML (검색은 브라우저에서 search.js가 수행)"""
+    return page_template.render(
+        PAGE_TITLE="상품 검색",
+        MAIN_CONTENT="""
+        <div class="search-section">
+            <h2 class="section-title">🔍 상품 검색</h2>
+            <input id="search-input" type="search" placeholder="상품명을 입력하세요" autocomplete="off"
+                   style="width: 100%; padding: 12px; font-size: 16px; border: 2px solid #FF416C; border-radius: 8px;">
+            <p id="search-status" style="margin: 10px 0;"></p>
+            <div id="search-results" class="grid-container"></div>
+        </div>
+        <script src="search.js" defer></script>
+""",
+    )
+
+def write_category_chunks(manifest, output_dir, category_slug, items):
+    """
+    첫 화면 이후 상품을 CATEGORY_PAGE_SIZE개씩 JSON 조각으로 저장하고 첫 조각 경로 반환 (없으면 None)
+    조각에는 카드 HTML과 다음 조각 경로가 들어 있고, 상품 수가 줄어 남게 된 이전 조각은 삭제
+    """
+    chunk_dir = os.path.join(output_dir, CHUNK_DIR)
+    chunks = [items[i:i + CATEGORY_PAGE_SIZE] for i in range(0, len(items), CATEGORY_PAGE_SIZE)]
+    names = [f"{category_slug}-{number}.json" for number in range(2, len(chunks) + 2)]
+    for index, chunk_items in enumerate(chunks):
+        next_name = f"{CHUNK_DIR}/{names[index + 1]}" if index + 1 < len(chunks) else None
+        content = chunk_json(render_cards(chunk_items), next_name)
+        manifest.write_page(os.path.join(chunk_dir, names[index]), content)
+    
+    if os.path.isdir(chunk_dir):
+        pattern = re.compile(rf"{re.escape(category_slug)}-\d+\.json")
+        for name in os.listdir(chunk_dir):
+            if pattern.fullmatch(name) and name not in names:
+                os.remove(os.path.join(chunk_dir, name))
+    return f"{CHUNK_DIR}/{names[0]}" if names else None
+
+def render_category_page(page_template, manifest, template_hash,
+                         category_file_path, category_name, processed_items):
+    """
+    카테고리 상세 페이지 렌더링 + 저장 (렌더 워커에서 실행) 후 결과 메시지 반환
+    템플릿, 마크업 코드(PAGE_RENDER_VERSION), 상품 구성이 지난 빌드와 같으면 렌더링 생략
+    첫 CATEGORY_PAGE_SIZE개만 HTML에 넣고 나머지는 조각으로 나눠, 상품 수와 관계없이 첫 페이지 크기가 일정
+    """
+    page_name = os.path.basename(category_file_path)
+    category_slug = os.path.splitext(page_name)[0]
+    product_set_hash = manifest.record_product_set(category_slug, processed_items)
+    page_input_hash = hash_inputs(template_hash, PAGE_RENDER_VERSION, category_name, product_set_hash,
+                                  CATEGORY_PAGE_SIZE)
+    
+    if manifest.is_fresh(category_file_path, page_input_hash):
+        return f"  ↺ {page_name} 변경 없음 (렌더링 생략)"
+    
+    first_page_items = processed_items[:CATEGORY_PAGE_SIZE]
+    first_page_html = render_cards(first_page_items)
+    next_chunk = write_category_chunks(manifest, os.path.dirname(category_file_path),
+                                       category_slug, processed_items[CATEGORY_PAGE_SIZE:])
+    page_html = category_page_html(page_template, category_name, first_page_html,
+                                   len(processed_items) - len(first_page_items), next_chunk, kst_now_text())
+    
+    manifest.write_page(category_file_path, page_html, page_input_hash)
+    chunk_count = -(-(len(processed_items) - len(first_page_items)) // CATEGORY_PAGE_SIZE)
+    return f"  ✓ {page_name} 저장 완료 ({len(processed_items)}개 상품, 첫 화면 {len(first_page_items)}개 + 조각 {chunk_count}개)"
+
+def write_hub_page(manifest, file_path, render):
+    """
+    허브/메인 페이지 저장 후 실제로 썼는지 반환
+    render(update_time) → HTML. 갱신 시각을 뺀 내용이 지난 빌드와 같으면 쓰지 않아 (상세 페이지와 같은 증분 규칙)
+    매시간 실행에서도 상품이 그대로면 페이지와 표시 시각이 함께 유지됨
+    """
+    page_input_hash = hash_inputs(render(''))
+    if manifest.is_fresh(file_path, page_input_hash):
+        return False
+    return manifest.write_page(file_path, render(kst_now_text()), page_input_hash)
+
+# 상세 페이지 마크업 코드 버전 (카드/페이지/조각 생성 함수가 바뀌면 지난 빌드의 페이지를 재사용하지 않음)
+PAGE_RENDER_VERSION = hash_inputs(*(inspect.getsource(func) for func in (
+    create_product_card, render_cards, chunk_json, category_page_html, write_category_chunks,
+    render_category_page,
+)))
+
+def stream_category_pages(api_handler, category_ids, max_workers=MAX_FETCH_WORKERS):
+    """
+    여러 카테고리를 동시에 조회하며 상품 묶음이 도착하는 대로 (category_id, page, error) 반환
+    (page: 응답 본문을 읽는 중에 api_handler가 넘겨준 상품 묶음)
+    카테고리마다 마지막에 page=None (완료 표시, 실패 시 error 포함)을 한 번 보냄
+    대기열 크기를 제한해 소비가 늦으면 조회 워커가 기다리므로 메모리에 쌓이는 묶음 수가 일정
+    호출 간격은 api_handler.rate_limiter가 전체 워커에 걸쳐 제한
+    """
+    category_ids = list(category_ids)
+    pages = queue.Queue(maxsize=max_workers * 2)
+    cancelled = False
+    
+    def put(event):
+        # 소비 측이 중간에 멈추면 워커가 put에서 영원히 대기하지 않도록 주기적으로 확인
+        while not cancelled:
+            try:
+                pages.put(event, timeout=0.5)
+                return
+            except queue.Full:
                 continue
-        
-        if original_price < sale_price:
-            continue
-        
-        # 할인율 계산
-        discount_rate = round(((original_price - sale_price) / original_price) * 100)
-        item['discountRate'] = discount_rate
-        item['originalPrice'] = original_price
-        item['salePrice'] = sale_price
-        
-        # 역대 최저가 기록 및 비교
-        product_id = str(item.get('productId', ''))
-        current_price = sale_price
-        is_all_time_low = False
-        
-        if product_id:
-            if product_id not in db:
-                # 처음 보는 상품이면
-                db[product_id] = {'history': [current_price]}
-                is_all_time_low = True  # 첫 가격이 역대 최저가
-            else:
-                # 기록이 있는 상품이면
-                all_time_low_price = min(db[product_id]['history'])
-                if current_price < all_time_low_price:
-                    # 기록 갱신 시
-                    is_all_time_low = True
-                db[product_id]['history'].append(current_price)  # 현재 가격을 기록에 추가
-        
-        item['isAllTimeLow'] = is_all_time_low
-        processed_items.append(item)
     
-    # 할인율이 높은 순으로 정렬
-    processed_items.sort(key=lambda x: x.get('discountRate', 0), reverse=True)
-    return processed_items
+    def fetch(category_id):
+        error = None
+        try:
+            for page in api_handler.iter_bestseller_pages(category_id):
+                if cancelled:
+                    return
+                put((category_id, page, None))
+        except Exception as e:
+            error = e
+        put((category_id, None, error))
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for category_id in category_ids:
+            executor.submit(fetch, category_id)
+        remaining = len(category_ids)
+        while remaining:
+            event = pages.get()
+            if event[1] is None:
+                remaining -= 1
+            yield event
+    finally:
+        cancelled = True
+        executor.shutdown(wait=True)
+
+def event_slug(event_id):
+    """기획전 페이지/피드 이름 (event-{기획전 ID})"""
+    return "event-" + re.sub(r'[^0-9A-Za-z_-]', '', str(event_id))
+
+def stream_event_products(api_handler, events, max_workers=MAX_FETCH_WORKERS,
+                          max_events=EVENT_MAX_COUNT, budget_seconds=EVENT_BUDGET_SECONDS):
+    """
+    기획전별 상품을 동시에 조회하며 끝나는 순서대로 (event, items, error) 반환
+    동시 요청은 max_workers개까지, 재시도/호출 간격은 api_handler 공통 정책을 따름
+    실행 예산(max_events개 / budget_seconds초)을 넘어 조회하지 못한 기획전은 마지막에 items=None으로 반환
+    (예산은 새 조회를 시작할 때만 확인하므로 이미 시작한 조회는 끝까지 기다림)
+    """
+    deadline = time.monotonic() + budget_seconds
+    pending = list(events)
+    skipped = pending[max_events:]
+    pending = pending[:max_events]
+    
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < max_workers and time.monotonic() < deadline:
+                event = pending.pop(0)
+                running[executor.submit(api_handler.get_special_event_products, event['eventId'])] = event
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                event = running.pop(future)
+                try:
+                    yield event, future.result(), None
+                except Exception as e:
+                    yield event, [], e
+    finally:
+        executor.shutdown(wait=True)
+    
+    for event in pending + skipped:
+        yield event, None, None
 
-def main():
+def remove_stale_event_pages(output_dir, keep_slugs):
+    """목록에서 사라진(종료된) 기획전의 페이지와 상품 조각 삭제 후 삭제한 페이지 수 반환"""
+    removed = 0
+    page_pattern = re.compile(r"(event-[0-9A-Za-z_-]+)\.html")
+    for name in os.listdir(output_dir):
+        match = page_pattern.fullmatch(name)
+        if match and match.group(1) not in keep_slugs:
+            os.remove(os.path.join(output_dir, name))
+            removed += 1
+    chunk_dir = os.path.join(output_dir, CHUNK_DIR)
+    if os.path.isdir(chunk_dir):
+        chunk_pattern = re.compile(r"(event-[0-9A-Za-z_-]+)-\d+\.json")
+        for name in os.listdir(chunk_dir):
+            match = chunk_pattern.fullmatch(name)
+            if match and match.group(1) not in keep_slugs:
+                os.remove(os.path.join(chunk_dir, name))
+    return removed
+
+def main(offline=False, use_cache=True, refresh_all=False):
     print("============================================")
     print("쿠팡 파트너스 다중 페이지 딜 사이트 HTML 생성 시작")
     print("============================================")
     
+    # 단계별 소요 시간 / API 호출 지표 (실행 리포트로 저장)
+    metrics = BuildMetrics()
+    
     try:
         # 0. 가격 기록 DB 로드
         print("[0/7] 가격 기록 DB 로드...")
-        db = load_price_db()
-        print(f"  ✓ {len(db)}개 상품의 가격 기록을 불러왔습니다.")
+        metrics.begin_stage('db_load')
+        price_store = open_price_store(DB_FILE)
+        # 다른 실행이 남긴 세그먼트를 먼저 병합해야 역대 최저가 판정이 정확함
+        # (오프라인 재생은 저장된 상태를 읽기만 해 같은 캐시로 여러 번 빌드해도 결과가 같음)
+        pending = {'segments_applied': 0} if offline else compact_segments(price_store)
+        if pending['segments_applied']:
+            print(f"  ✓ 병합되지 않은 가격 기록 세그먼트 {pending['segments_applied']}개를 반영했습니다.")
+        db = {}
+        # 이번 실행의 상품 테이블 (productId당 정규화/가격 관측 1회, 섹션은 ID로 참조)
+        product_table = ProductTable(price_store, db)
+        tracked_products = price_store.count_products()
+        print(f"  ✓ {tracked_products}개 상품의 가격 기록이 있습니다. (이번 실행 상품만 조회)")
+        metrics.end_stage('db_load', tracked_products=tracked_products,
+                          segments_applied=pending['segments_applied'])
         
         # 1. 기본 템플릿 로드
         print("[1/7] 기본 템플릿 로드...")
-        with open('template.html', 'r', encoding='utf-8') as f:
-            base_template = f.read()
+        metrics.begin_stage('template_load')
+        # 한 번만 파싱해 고정 구간 + 슬롯으로 컴파일 (알 수 없는/빠진 슬롯은 여기서 오류)
+        page_template = load_template('template.html', PAGE_REQUIRED_SLOTS, PAGE_OPTIONAL_SLOTS)
+        if page_template.missing_optional:
+            print(f"  ℹ 템플릿에 없는 선택 슬롯: {', '.join(page_template.missing_optional)} (값은 무시됨)")
+        template_hash = hash_inputs(page_template.source)
+        
+        # 증분 빌드 매니페스트 (입력이 바뀐 페이지만 렌더링/저장)
+        manifest = BuildManifest()
+        metrics.end_stage('template_load')
         
         # 2. API 핸들러 초기화
         print("[2/7] 쿠팡 API 핸들러 초기화...")
-        api_handler = CoupangApiHandler()
-        
-        # 3. 카테고리 맵 정의
-        ALL_CATEGORIES = {
-            '1016': ('가전/디지털', 'digital'),
-            '1024': ('헬스/건강식품', 'health'),
-            '1001': ('여성패션', 'womens-fashion'),
-            '1002': ('남성패션', 'mens-fashion'),
-            '1003': ('화장품', 'beauty'),
-            '1004': ('식품', 'food'),
-            '1005': ('생활용품', 'home'),
-            '1006': ('도서', 'books'),
-            '1007': ('스포츠', 'sports'),
-            '1008': ('완구', 'toys'),
-            '1009': ('반려동물', 'pets'),
-            '1010': ('출산/유아동', 'baby'),
-            '1011': ('식물', 'plants'),
-            '1012': ('자동차', 'automotive'),
-            '1013': ('기타', 'others')
-        }
-        
-        TOP_CATEGORIES = {
-            '1016': ('가전/디지털', 'digital'),
-            '1024': ('헬스/건강식품', 'health'),
-            '1001': ('여성패션', 'womens-fashion'),
-            '1003': ('화장품', 'beauty'),
-            '1004': ('식품', 'food')
-        }
+        api_handler = CoupangApiHandler(use_cache=use_cache, offline=offline, metrics=metrics)
         
         # 4. 변수 초기화
-        main_page_sections_html = ""
-        category_hub_html = ""
-        
         # 골드박스 및 베스트셀러 HTML (메인 페이지용)
         goldbox_html = ""
         bestseller_html = ""
+        # JSON 피드로 내보낼 섹션 (피드 이름 → (제목, 상품 레코드 목록))
+        feed_sections = {}
         
         # 5. 골드박스 상품 조회
         print("[3/6] 골드박스 상품 조회...")
+        metrics.begin_stage('goldbox')
+        processed_items = []
         try:
             print("  - 골드박스 상품 조회 중...")
+            product_list = api_handler.get_goldbox_products()
             
-            METHOD = "GET"
-            PATH = "/v2/providers/affiliate_open_api/apis/openapi/v1/products/goldbox"
-            QUERY = f"subId={api_handler.channel_id}"
-            
-            authorization = api_handler._generate_hmac(METHOD, PATH, QUERY)
-            headers = {"Authorization": authorization}
-            url = f"{api_handler.base_url}{PATH}?{QUERY}"
-            
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            product_list = response.json().get('data', [])
-            
-            # API 호출 직후 1초 대기
-            time.sleep(1)
-            
-            processed_items = process_products(product_list, db)
-            goldbox_html = "".join([create_product_card(item, item.get('isAllTimeLow', False)) for item in processed_items])
+            processed_items = product_table.by_discount(product_table.add(product_list))
+            feed_sections['goldbox'] = ('골드박스 특가', processed_items)
+            goldbox_html = render_cards(processed_items)
             print(f"  ✓ 골드박스 상품 {len(processed_items)}개 처리 완료")
         
         except Exception as e:
             print(f"  ❌ 골드박스 상품 조회 실패: {e}")
+        metrics.end_stage('goldbox', products=len(processed_items))
         
         # 6. 베스트셀러 상품 조회 (메인 페이지용)
         print("[4/6] 베스트셀러 상품 조회...")
+        metrics.begin_stage('bestseller')
+        bestseller_ids = []
         try:
             # TOP 5 카테고리 중 첫 번째 카테고리로 베스트셀러 조회
             first_top_category_id = list(TOP_CATEGORIES.keys())[0]
             category_name = TOP_CATEGORIES[first_top_category_id][0]
             
             print(f"  - 베스트셀러({category_name}, {first_top_category_id}) 상품 조회 중...")
-            items = api_handler.get_bestseller_products(category_id=first_top_category_id)
+            # 카테고리 조회와 같은 쿼리로 요청해 뒤의 상세 페이지 조회가 응답 캐시를 재사용
+            items = api_handler.get_bestseller_products(category_id=first_top_category_id, limit=BESTSELLER_LIMIT)
             
-            # API 호출 직후 1초 대기
-            time.sleep(1)
-            
-            if items:
-                # 베스트셀러는 가격 기록 없이 처리 (간단히)
-                bestseller_html = "".join([create_product_card(item, False) for item in items[:10]])
-                print(f"  ✓ 베스트셀러 상품 {len(items)}개 처리 완료")
+            # 카테고리 상세 페이지와 같은 상품이므로 테이블에 한 번만 반영 (순위 순서 유지)
+            bestseller_ids = product_table.add(items)
+            if bestseller_ids:
+                bestseller_html = render_cards(product_table.records(bestseller_ids[:10]))
+                print(f"  ✓ 베스트셀러 상품 {len(bestseller_ids)}개 처리 완료")
         except Exception as e:
             print(f"  ❌ 베스트셀러 상품 조회 실패: {e}")
+        metrics.end_stage('bestseller', products=len(bestseller_ids))
         
-        # 7. 메인 루프 (15개 카테고리 전체 반복)
-        print("[5/6] 카테고리별 상세 페이지 생성...")
         output_dir = './docs'
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        for category_id, (category_name, category_slug) in ALL_CATEGORIES.items():
+        # 카테고리 결과는 도착하는 순서대로 처리하고, 링크/섹션은 정의 순서대로 조립
+        category_hub_links = {}
+        main_page_sections = {}
+        
+        # 갱신 주기가 돌아온 카테고리만 조회 (가격 변경이 잦은 카테고리일수록 주기가 짧음)
+        metrics.begin_stage('schedule')
+        _, previous_feeds = load_feed_state(output_dir)
+        scheduler = RefreshScheduler(price_store)
+        due_categories, reused_categories = scheduler.plan(
+            {cid: list(previous_feeds[slug]) if slug in previous_feeds else None
+             for cid, (_, slug) in ALL_CATEGORIES.items()},
+            # 베스트셀러와 같은 요청이라 조회 비용이 들지 않는 카테고리는 항상 갱신
+            always={list(TOP_CATEGORIES)[0]},
+        )
+        if refresh_all or offline:
+            due_categories, reused_categories = list(ALL_CATEGORIES), []
+        
+        # 재사용 카테고리는 지난 피드의 상품으로 링크/메인 섹션/피드/검색 색인을 채움 (가격 기록은 갱신하지 않음)
+        carried_products = {}
+        for category_id in reused_categories:
+            category_name, category_slug = ALL_CATEGORIES[category_id]
+            records = list(previous_feeds[category_slug].values())
+            feed_sections[category_slug] = (category_name, records)
+            for record in records:
+                carried_products.setdefault(str(record.get('productId')), record)
+            if os.path.exists(os.path.join(output_dir, f"{category_slug}.html")):
+                category_hub_links[category_id] = hub_link_html(category_slug, category_name)
+            if category_id in TOP_CATEGORIES:
+                main_page_sections[category_id] = category_section_html(
+                    category_name, category_slug, render_cards(records[:5]))
+            entry = scheduler.categories[category_id]
+            print(f"  ↺ {category_name}: 지난 빌드 재사용 (갱신 주기 {entry['interval_hours']}시간, "
+                  f"다음 조회까지 {scheduler.next_due_hours(category_id):.1f}시간)")
+        print(f"  ✓ 이번 실행 조회 {len(due_categories)}개 / 재사용 {len(reused_categories)}개 카테고리")
+        metrics.end_stage('schedule', due=len(due_categories), reused=len(reused_categories))
+        
+        # 7. 메인 루프 (갱신 주기가 돌아온 카테고리 반복)
+        print("[5/6] 카테고리별 상세 페이지 생성...")
+        metrics.begin_stage('categories')
+        
+        # 카테고리 페이지의 나머지 상품 지연 로딩 스크립트
+        copy_static_asset(manifest, output_dir, 'lazy_cards.js')
+        
+        # 상세 페이지 렌더 단계 (가격 기록 갱신은 메인 스레드, 렌더링/파일 쓰기는 워커)
+        render_executor = ThreadPoolExecutor(max_workers=MAX_RENDER_WORKERS)
+        render_futures = {}
+        
+        # 카테고리별 상품 ID (도착한 묶음 단위로 상품 테이블에 반영 후 누적)
+        category_product_ids = {}
+        received_counts = {}
+        failed_categories = set()
+        
+        for category_id, page, error in stream_category_pages(api_handler, due_categories):
+            category_name, category_slug = ALL_CATEGORIES[category_id]
+            if category_id in failed_categories:
+                continue
             try:
-                print(f"  - {category_name} ({category_id}) 처리 중...")
+                if error is not None:
+                    raise error
                 
-                # API 호출 전 2초 대기 (API 안정성을 위해, 504 에러 방지)
-                time.sleep(2)
-                
-                # API 호출: bestcategories (재시도 로직 포함)
-                METHOD = "GET"
-                PATH = f"/v2/providers/affiliate_open_api/apis/openapi/v1/products/bestcategories/{category_id}"
-                QUERY = f"subId={api_handler.channel_id}"
-                
-                authorization = api_handler._generate_hmac(METHOD, PATH, QUERY)
-                headers = {"Authorization": authorization}
-                url = f"{api_handler.base_url}{PATH}?{QUERY}"
-                
-                # 504 에러 재시도 로직 (최대 3회)
-                max_retries = 3
-                retry_count = 0
-                response = None
-                
-                while retry_count < max_retries:
-                    try:
-                        response = requests.get(url, headers=headers, timeout=30)
-                        response.raise_for_status()
-                        break  # 성공하면 루프 탈출
-                    except requests.exceptions.HTTPError as e:
-                        if e.response.status_code == 504 and retry_count < max_retries - 1:
-                            retry_count += 1
-                            wait_time = (retry_count * 2) + 2  # 2초, 4초, 6초...
-                            print(f"    ⚠ 504 Gateway Timeout 발생. {wait_time}초 후 재시도 ({retry_count}/{max_retries-1})...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            raise  # 다른 에러이거나 재시도 횟수 초과
-                    except requests.exceptions.Timeout:
-                        if retry_count < max_retries - 1:
-                            retry_count += 1
-                            wait_time = (retry_count * 2) + 2
-                            print(f"    ⚠ Timeout 발생. {wait_time}초 후 재시도 ({retry_count}/{max_retries-1})...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            raise
-                
-                result_json = response.json()
-                product_list = result_json.get('data', [])
-                
-                # 디버깅: API 응답 확인
-                print(f"    📊 API 응답: 총 {len(product_list)}개 상품 수신")
-                if len(product_list) > 0:
-                    sample_item = product_list[0]
-                    print(f"    📋 샘플 상품 필드: {list(sample_item.keys())}")
-                    print(f"    💰 샘플 가격 정보: originalPrice={sample_item.get('originalPrice', 'N/A')}, salePrice={sample_item.get('salePrice', 'N/A')}, productPrice={sample_item.get('productPrice', 'N/A')}")
-                
-                # API 호출 직후 2초 대기 (서버 부하 방지)
-                time.sleep(2)
+                if page is not None:
+                    if category_id not in received_counts:
+                        print(f"  - {category_name} ({category_id}) 처리 중...")
+                        # 디버깅: API 응답 확인
+                        sample_item = page[0]
+                        print(f"    📋 샘플 상품 필드: {list(sample_item.keys())}")
+                        print(f"    💰 샘플 가격 정보: originalPrice={sample_item.get('originalPrice', 'N/A')}, salePrice={sample_item.get('salePrice', 'N/A')}, productPrice={sample_item.get('productPrice', 'N/A')}")
+                    received_counts[category_id] = received_counts.get(category_id, 0) + len(page)
+                    
+                    # 상품 처리 (묶음 단위 파이프라인 - 응답 본문을 다 받기 전에 시작)
+                    category_product_ids.setdefault(category_id, []).extend(product_table.add(page))
+                    metrics.incr('category_batches')
+                    continue
                 
-                # 상품 처리
-                processed_items = process_products(product_list, db)
+                # 마지막 묶음까지 처리됨 → 할인율 순 정렬 후 렌더 단계로
+                processed_items = product_table.by_discount(category_product_ids.pop(category_id, []))
                 
+                print(f"  - {category_name} ({category_id}) 조회 완료")
+                print(f"    📊 API 응답: 총 {received_counts.get(category_id, 0)}개 상품 수신")
                 print(f"    📦 필터링 후: {len(processed_items)}개 상품")
+                metrics.incr('category_products', len(processed_items))
+                feed_sections[category_slug] = (category_name, processed_items)
+                if received_counts.get(category_id):
+                    scheduler.mark_fetched(category_id)
                 
                 if not processed_items:
                     print(f"    ⚠ {category_name} 상품이 없습니다. (필터링 조건: originalPrice > 0 && originalPrice >= salePrice)")
                     continue
                 
-                # (A) 전체 상품 HTML
-                all_products_html = "".join([create_product_card(item, item.get('isAllTimeLow', False)) for item in processed_items])
-                
                 # (B) 미리보기 HTML (상위 5개)
-                preview_products_html = "".join([create_product_card(item, item.get('isAllTimeLow', False)) for item in processed_items[:5]])
-                
-                # 작업 1: 상세 페이지 저장
-                page_html = base_template.replace("%%PAGE_TITLE%%", f"{category_name} 핫딜")
-                page_html = page_html.replace("%%UPDATE_TIME%%", f"{(datetime.utcnow() + timedelta(hours=9)).strftime('%Y년 %m월 %d일 %H시 %M분')} 기준")
-                page_html = page_html.replace("%%GOLDBOX_CARDS%%", "")
-                page_html = page_html.replace("%%RECOMMENDATION_CARDS%%", "")
-                page_html = page_html.replace("%%MAIN_CONTENT%%", f"""
-        <div class="category-detail-section">
-            <h2 class="section-title">{category_name} 핫딜</h2>
-            <div class="grid-container">
-                {all_products_html}
-            </div>
-        </div>
-""")
+                preview_products_html = render_cards(processed_items[:5])
                 
+                # 작업 1: 상세 페이지 렌더링/저장은 렌더 워커에 넘기고 다음 카테고리 처리 계속
                 category_file_path = os.path.join(output_dir, f"{category_slug}.html")
-                with open(category_file_path, 'w', encoding='utf-8') as f:
-                    f.write(page_html)
-                
-                print(f"    ✓ {category_slug}.html 저장 완료 ({len(processed_items)}개 상품)")
+                render_futures[category_id] = render_executor.submit(
+                    render_category_page, page_template, manifest, template_hash,
+                    category_file_path, category_name, processed_items,
+                )
                 
                 # 작업 2: 허브 페이지 링크 누적
-                category_hub_html += f'<a href="{category_slug}.html" class="category-link">{category_name}</a>\n        '
+                category_hub_links[category_id] = hub_link_html(category_slug, category_name)
                 
                 # 작업 3: 메인 페이지 섹션 누적 (TOP 5만)
                 if category_id in TOP_CATEGORIES:
-                    main_page_sections_html += f"""
-        <div class="category-section">
-            <h2 class="section-title" style="margin-top: 40px;">🔥 {category_name} 핫딜</h2>
-            <div class="grid-container">
-                {preview_products_html}
-            </div>
-            <div style="text-align: center; margin-top: 20px;">
-                <a href="{category_slug}.html" style="display: inline-block; padding: 10px 20px; background-color: #FF416C; color: white; text-decoration: none; border-radius: 5px; font-weight: bold;">더보기 →</a>
-            </div>
-        </div>
-"""
+                    main_page_sections[category_id] = category_section_html(category_name, category_slug,
+                                                                             preview_products_html)
                     print(f"    ✓ 메인 페이지 섹션 추가 완료")
             
             except Exception as e:
                 print(f"    ❌ {category_name} 처리 실패: {e}")
+                metrics.incr('category_failures')
+                failed_categories.add(category_id)
+                category_product_ids.pop(category_id, None)
                 continue
+        metrics.end_stage('categories', categories=len(due_categories),
+                          unique_products=product_table.stats['unique'],
+                          duplicate_products=product_table.stats['duplicates'])
         
-        # 8. 최종 2개 페이지 저장
-        print("[6/6] 최종 페이지 저장...")
-        now = (datetime.utcnow() + timedelta(hours=9)).strftime("%Y년 %m월 %d일 %H시 %M분")
+        # 기획전 (목록 조회 → 기획전별 상품 동시 조회 → 기획전 페이지 + 기획전 허브)
+        print("[5/6] 기획전 페이지 생성...")
+        metrics.begin_stage('events')
+        # 허브에 올릴 기획전 (목록 순서) [슬러그, 이름, 이번 실행 상품 수 (조회 못 했으면 None)]
+        event_entries = []
+        event_render_futures = {}
+        event_stats = {'events': 0, 'fetched': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+        events = []
+        try:
+            events = [event for event in api_handler.get_special_event_list() if event.get('eventId') is not None]
+        except Exception as e:
+            # 목록 응답이 중간에 끊기면 일부 목록으로 지난 기획전을 지우지 않도록 빈 목록으로 처리
+            print(f"  ❌ 기획전 목록 조회 실패: {e}")
+        # 목록이 비어 있으면 (API 실패 포함) 지난 기획전 페이지/피드를 그대로 둠
+        event_slugs = [event_slug(event['eventId']) for event in events] if events else None
+        event_stats['events'] = len(events)
+        if not events:
+            print("  ⚠ 기획전 목록이 비어 있습니다. 지난 빌드의 기획전 페이지를 유지합니다.")
         
-        # (1) 허브 페이지: category.html
-        hub_html = base_template.replace("%%PAGE_TITLE%%", "카테고리 전체보기")
-        hub_html = hub_html.replace("%%UPDATE_TIME%%", f"{now} 기준")
-        hub_html = hub_html.replace("%%GOLDBOX_CARDS%%", "")
-        hub_html = hub_html.replace("%%RECOMMENDATION_CARDS%%", "")
+        event_counts = {}
+        for event, items, error in stream_event_products(api_handler, events):
+            slug = event_slug(event['eventId'])
+            event_name = event.get('eventName') or f"기획전 {event['eventId']}"
+            if items is None:
+                event_stats['skipped'] += 1
+                continue
+            if error is not None or not items:
+                print(f"    ❌ {event_name} 상품 조회 실패: {error or '상품 없음'}")
+                event_stats['failed'] += 1
+                continue
+            
+            # 다른 섹션과 겹치는 상품은 상품 테이블이 한 번만 처리
+            processed_items = product_table.by_discount(product_table.add(items))
+            event_stats['fetched'] += 1
+            if not processed_items:
+                continue
+            event_counts[slug] = len(processed_items)
+            feed_sections[slug] = (event_name, processed_items)
+            event_render_futures[slug] = render_executor.submit(
+                render_category_page, page_template, manifest, template_hash,
+                os.path.join(output_dir, f"{slug}.html"), event_name, processed_items,
+            )
+            print(f"  - {event_name}: {len(processed_items)}개 상품")
         
-        # 카테고리 링크 스타일 추가
-        category_hub_content = f"""
-        <div class="category-hub-section">
-            <h2 class="section-title">전체 카테고리</h2>
-            <div style="display: grid; grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); gap: 15px; margin-top: 20px;">
-                {category_hub_html}
-            </div>
-        </div>
-"""
-        hub_html = hub_html.replace("%%MAIN_CONTENT%%", category_hub_content)
+        for event in events:
+            slug = event_slug(event['eventId'])
+            # 이번에 조회하지 못한 기획전은 지난 빌드 페이지가 있을 때만 링크
+            if slug in event_counts or os.path.exists(os.path.join(output_dir, f"{slug}.html")):
+                event_entries.append([slug, event.get('eventName') or f"기획전 {event['eventId']}",
+                                      event_counts.get(slug)])
+        if event_slugs is not None:
+            event_stats['removed'] = remove_stale_event_pages(output_dir, set(event_slugs))
+        if event_stats['skipped']:
+            print(f"  ⚠ 실행 예산 초과로 기획전 {event_stats['skipped']}개는 다음 실행으로 미룹니다. "
+                  f"(최대 {EVENT_MAX_COUNT}개 / {EVENT_BUDGET_SECONDS:.0f}초)")
+        print(f"  ✓ 기획전 {event_stats['events']}개 중 {event_stats['fetched']}개 조회, "
+              f"실패 {event_stats['failed']}개, 종료된 기획전 페이지 {event_stats['removed']}개 삭제")
+        metrics.end_stage('events', **event_stats)
         
-        hub_file_path = os.path.join(output_dir, 'category.html')
-        with open(hub_file_path, 'w', encoding='utf-8') as f:
-            f.write(hub_html)
-        print(f"  ✓ category.html 저장 완료")
+        print(f"  ✓ 상품 테이블: 고유 상품 {product_table.stats['unique']}개 "
+              f"(섹션 간 중복 {product_table.stats['duplicates']}건은 한 번만 처리)")
         
-        # (2) 메인 페이지: index.html
-        main_content = ""
+        # 렌더 단계 완료 대기 (실패한 카테고리는 허브/메인 페이지에서 제외)
+        metrics.begin_stage('render_wait')
+        for category_id, future in render_futures.items():
+            category_name = ALL_CATEGORIES[category_id][0]
+            try:
+                print(f"  {future.result()}")
+            except Exception as e:
+                print(f"    ❌ {category_name} 상세 페이지 렌더링 실패: {e}")
+                category_hub_links.pop(category_id, None)
+                main_page_sections.pop(category_id, None)
+        for slug, future in event_render_futures.items():
+            try:
+                print(f"  {future.result()}")
+            except Exception as e:
+                print(f"    ❌ {slug} 기획전 페이지 렌더링 실패: {e}")
+                event_entries = [entry for entry in event_entries if entry[0] != slug]
+        render_executor.shutdown()
+        metrics.end_stage('render_wait', pages=len(render_futures) + len(event_render_futures))
         
-        # 골드박스 섹션
-        if goldbox_html:
-            main_content += f"""
-        <div class="goldbox-section">
-            <h2 class="section-title">✨ 골드박스 특가</h2>
-            <div class="grid-container">
-                {goldbox_html}
-            </div>
-        </div>
-"""
+        # 상품 검색 색인 (바뀐 샤드만 다시 씀) + 검색 페이지
+        metrics.begin_stage('search_index')
+        search_products = dict(carried_products)
+        search_products.update(product_table.products)
+        search_stats = write_search_index(output_dir, search_products, manifest)
+        copy_static_asset(manifest, output_dir, 'search.js')
+        manifest.write_page(os.path.join(output_dir, 'search.html'), search_page_html(page_template))
+        print(f"  ✓ 검색 색인: 샤드 {search_stats['shards']}개 중 {search_stats['written']}개 갱신, "
+              f"{search_stats['unchanged']}개 그대로, {search_stats['removed']}개 삭제 "
+              f"(가장 큰 샤드 {search_stats['largest_kb']} KB)")
+        metrics.end_stage('search_index', products=len(search_products), **search_stats)
         
-        # 베스트셀러 섹션
-        if bestseller_html:
-            main_content += f"""
-        <div class="bestseller-section">
-            <h2 class="section-title" style="margin-top: 40px;">🔥 베스트셀러</h2>
-            <div class="grid-container">
-                {bestseller_html}
-            </div>
-        </div>
-"""
+        # 지난 실행 스냅샷과 비교 (새 상품 / 가격 인하 / 인상 / 사라진 상품)
+        metrics.begin_stage('snapshot_diff')
+        current_snapshot = build_snapshot({name: records for name, (_, records) in feed_sections.items()})
+        previous_snapshot = load_snapshot()
+        just_dropped_html = ""
+        if previous_snapshot is None:
+            print("  ℹ 지난 실행 스냅샷이 없어 가격 변화 비교를 건너뜁니다.")
+            metrics.end_stage('snapshot_diff', previous=False)
+        else:
+            diff = diff_snapshots(previous_snapshot, current_snapshot)
+            dropped_records = [product_table.get(product_id) for product_id, _, _ in diff['dropped'][:JUST_DROPPED_LIMIT]]
+            just_dropped_html = render_cards([record for record in dropped_records if record])
+            print(f"  ✓ 지난 실행 대비: 새 상품 {len(diff['new'])}개, 가격 인하 {len(diff['dropped'])}개, "
+                  f"인상 {len(diff['rose'])}개, 사라진 상품 {len(diff['gone'])}개")
+            metrics.end_stage('snapshot_diff', previous=True, **{key: len(value) for key, value in diff.items()})
+        
+        # 상품 JSON 피드 + 지난 빌드 대비 변경분
+        metrics.begin_stage('feeds')
+        # 기획전 목록을 받지 못했으면 지난 피드를 모두 유지 (known_feeds=None)
+        known_feeds = None
+        if event_slugs is not None:
+            known_feeds = {'goldbox'} | {slug for _, slug in ALL_CATEGORIES.values()} | set(event_slugs)
+        feed_stats = write_feeds(output_dir, feed_sections, manifest, known_feeds=known_feeds,
+                                 record_delta=not offline)
+        print(f"  ✓ 상품 피드 {feed_stats['feeds']}개 (갱신 {feed_stats['written']}개, 지난 피드 유지 {feed_stats['carried_over']}개), "
+              f"변경분: 추가 {feed_stats['added']} / 삭제 {feed_stats['removed']} / 가격 변경 {feed_stats['repriced']}")
+        metrics.end_stage('feeds', **feed_stats)
         
-        # TOP 5 카테고리 섹션
-        main_content += main_page_sections_html
+        category_hub_html = "".join(category_hub_links[cid] for cid in ALL_CATEGORIES if cid in category_hub_links)
+        main_page_sections_html = "".join(main_page_sections[cid] for cid in TOP_CATEGORIES if cid in main_page_sections)
         
-        main_html = base_template.replace("%%PAGE_TITLE%%", "쿠팡 실시간 핫딜")
-        main_html = main_html.replace("%%UPDATE_TIME%%", f"{now} 기준")
-        main_html = main_html.replace("%%GOLDBOX_CARDS%%", "")
-        main_html = main_html.replace("%%RECOMMENDATION_CARDS%%", "")
-        main_html = main_html.replace("%%MAIN_CONTENT%%", main_content)
+        # 8. 최종 3개 페이지 저장
+        print("[6/6] 최종 페이지 저장...")
+        metrics.begin_stage('hub_and_index')
+        now = kst_now_text()
         
+        # (1) 허브 페이지: category.html
+        hub_file_path = os.path.join(output_dir, 'category.html')
+        if write_hub_page(manifest, hub_file_path, lambda update_time: hub_page_html(
+                page_template, "카테고리 전체보기", "전체 카테고리", category_hub_html, update_time)):
+            print(f"  ✓ category.html 저장 완료")
+        else:
+            print(f"  ↺ category.html 변경 없음")
+        
+        # (2) 기획전 허브 페이지: events.html
+        event_links_html = "".join(
+            hub_link_html(slug, f"{name} ({count}개)" if count is not None else name)
+            for slug, name, count in event_entries
+        )
+        if event_slugs is None and os.path.exists(os.path.join(output_dir, 'events.html')):
+            # 기획전 목록을 받지 못했으면 지난 페이지/피드와 함께 지난 허브도 유지
+            print(f"  ↺ events.html 유지 (기획전 목록 없음)")
+        elif write_hub_page(manifest, os.path.join(output_dir, 'events.html'), lambda update_time: hub_page_html(
+                page_template, "진행 중인 기획전", "🎁 진행 중인 기획전",
+                event_links_html or '<p>진행 중인 기획전이 없습니다.</p>', update_time)):
+            print(f"  ✓ events.html 저장 완료 (기획전 {len(event_entries)}개)")
+        else:
+            print(f"  ↺ events.html 변경 없음")
+        
+        # (3) 메인 페이지: index.html
         main_file_path = os.path.join(output_dir, 'index.html')
-        with open(main_file_path, 'w', encoding='utf-8') as f:
-            f.write(main_html)
-        print(f"  ✓ index.html 저장 완료")
+        if write_hub_page(manifest, main_file_path, lambda update_time: index_page_html(
+                page_template, update_time, goldbox_html, just_dropped_html,
+                bestseller_html, main_page_sections_html)):
+            print(f"  ✓ index.html 저장 완료")
+        else:
+            print(f"  ↺ index.html 변경 없음")
+        
+        manifest.save()
+        if not offline:
+            save_snapshot(current_snapshot)
+            scheduler.save()
+        metrics.end_stage('hub_and_index')
+        for name, value in manifest.stats.items():
+            metrics.incr(f"pages_{name}", value)
+        print(f"  ✓ 증분 빌드: 렌더링 {manifest.stats['rendered']}개 / 생략 {manifest.stats['skipped']}개, "
+              f"파일 쓰기 {manifest.stats['written']}개 / 내용 동일 {manifest.stats['unchanged']}개")
         
         # 9. 가격 기록 DB 저장
         print("[7/7] 가격 기록 DB 저장...")
-        save_price_db(db)
-        print(f"  ✓ {len(db)}개 상품의 가격 기록을 저장했습니다.")
+        if offline:
+            # 캐시 응답은 언제 받은 것인지 알 수 없으므로 현재 시각의 가격 기록으로 남기지 않음
+            print("  ℹ 오프라인 재생: 가격 기록/스냅샷/갱신 주기/피드 변경분을 저장하지 않습니다.")
+            price_store.close()
+        else:
+            metrics.begin_stage('db_save')
+            report = save_price_db(price_store, db)
+            print(f"  ✓ {len(db)}개 상품의 가격을 세그먼트로 기록했습니다. ({report['segment_path']})")
+            print(f"  ✓ 세그먼트 {report['segments_applied']}개 병합 (새 가격 구간 {report['new_runs']}건)")
+        
+            # 보존 정책 결과 (오래된 상품/구간 정리로 DB 크기 상한 유지)
+            print(f"  ✓ 보존 정책 적용: 미관측 상품 {report['stale_evicted']}개, "
+                  f"상한 초과 상품 {report['lru_evicted']}개 삭제, "
+                  f"가격 구간 {report['runs_removed']}건 삭제 / {report['runs_downsampled']}건 병합")
+            price_store.close()
+            metrics.end_stage('db_save', new_runs=report['new_runs'],
+                              stale_evicted=report['stale_evicted'], lru_evicted=report['lru_evicted'])
+        
+        # 실행 리포트 (JSON + 요약)
+        run_report = metrics.write_report()
+        print(metrics.summary(run_report))
         
         print("============================================")
         print(f"✅ 모든 페이지 생성 완료!")
@@ -437,7 +843,15 @@ def main():
         print(f"❌ 예상치 못한 오류 발생: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
+        metrics.incr('fatal_errors')
+        metrics.write_report()
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="쿠팡 파트너스 딜 사이트 HTML 생성")
+    parser.add_argument('--offline', action='store_true', help="API를 호출하지 않고 디스크 캐시의 응답만 재생 (가격 기록/상태 파일은 저장하지 않음)")
+    parser.add_argument('--no-cache', action='store_true', help="응답 캐시를 사용하지 않고 항상 API 호출")
+    parser.add_argument('--refresh-all', action='store_true', help="갱신 주기와 관계없이 모든 카테고리 조회")
+    args = parser.parse_args()
+    main(offline=args.offline, use_cache=not args.no_cache, refresh_all=args.refresh_all)
@@ -0,0 +1,147 @@
+"""
+빌드 지표 수집
+API 호출별 (지연 시간/속도 제한 대기/백오프/상태 코드/재시도/응답 크기/상품 수)과 빌드 단계별 소요 시간/카운터를 모아
+JSON 실행 리포트와 사람이 읽는 요약을 만듭니다.
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+# 실행 리포트 파일 (docs/ 옆에 저장)
+REPORT_FILE = os.getenv('BUILD_REPORT_FILE', 'build_report.json')
+
+
+def _percentile(values, ratio):
+    """정렬된 값 목록의 백분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+    return values[index]
+
+
+class BuildMetrics:
+    """API 호출/빌드 단계 지표 수집기 (여러 워커 스레드에서 동시에 기록 가능)"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.api_calls = []
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def new_api_call(self, method, path):
+        """API 호출 1건의 기록용 딕셔너리 생성 (호출 측에서 채운 뒤 record_api_call로 등록)"""
+        return {
+            'method': method, 'path': path, 'status': None, 'retries': 0,
+            'latency_ms': None, 'queue_ms': 0.0, 'backoff_ms': 0.0, 'bytes': 0, 'items': None, 'cache': 'miss', 'error': None,
+            '_start': time.perf_counter(),
+        }
+
+    def record_api_call(self, call):
+        """API 호출 1건 등록 (지연 시간을 채우지 않았으면 _start 시각부터 자동 계산)"""
+        start = call.pop('_start', None)
+        if call['latency_ms'] is None and start is not None:
+            call['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        with self.lock:
+            self.api_calls.append(call)
+
+    def begin_stage(self, name):
+        """빌드 단계 시작"""
+        with self.lock:
+            self.stages[name] = {'started_at': round(time.time() - self.started_at, 3),
+                                 'seconds': None, '_start': time.perf_counter()}
+
+    def end_stage(self, name, **counters):
+        """빌드 단계 종료 (처리 건수 등 카운터를 함께 기록)"""
+        with self.lock:
+            stage = self.stages[name]
+            stage['seconds'] = round(time.perf_counter() - stage.pop('_start'), 3)
+            stage.update(counters)
+
+    def incr(self, name, value=1):
+        """카운터 증가"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def api_summary(self):
+        """API 호출 집계"""
+        with self.lock:
+            calls = list(self.api_calls)
+        network_calls = [c for c in calls if c['cache'] == 'miss']
+        latencies = sorted(c['latency_ms'] for c in network_calls if c['latency_ms'] is not None)
+        status_counts = {}
+        for call in calls:
+            if call['cache'] == 'hit':
+                key = 'cache'
+            elif call['cache'] == 'coalesced':
+                key = 'coalesced'
+            else:
+                key = str(call['status'] if call['status'] is not None else call['error'] or 'unknown')
+            status_counts[key] = status_counts.get(key, 0) + 1
+        return {
+            'calls': len(calls),
+            'network_calls': len(network_calls),
+            'cache_hits': sum(1 for c in calls if c['cache'] == 'hit'),
+            'coalesced': sum(1 for c in calls if c['cache'] == 'coalesced'),
+            'retries': sum(c['retries'] for c in calls),
+            'failures': sum(1 for c in calls if c['error']),
+            'bytes': sum(c['bytes'] for c in calls),
+            'items': sum(c['items'] or 0 for c in calls),
+            'latency_ms_p50': _percentile(latencies, 0.5),
+            'latency_ms_p95': _percentile(latencies, 0.95),
+            'latency_ms_max': latencies[-1] if latencies else None,
+            'queue_ms_total': round(sum(c['queue_ms'] for c in network_calls), 1),
+            'backoff_ms_total': round(sum(c['backoff_ms'] for c in network_calls), 1),
+            'status_counts': status_counts,
+        }
+
+    def report(self):
+        """기계가 읽을 수 있는 실행 리포트"""
+        with self.lock:
+            stages = {name: {k: v for k, v in stage.items() if not k.startswith('_')}
+                      for name, stage in self.stages.items()}
+            counters = dict(self.counters)
+            calls = [dict(call) for call in self.api_calls]
+        return {
+            'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'run_id': os.getenv('GITHUB_RUN_ID'),
+            'stages': stages,
+            'counters': counters,
+            'api': self.api_summary(),
+            'api_calls': calls,
+        }
+
+    def write_report(self, path=REPORT_FILE):
+        """JSON 실행 리포트 저장 후 리포트 반환"""
+        report = self.report()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+    def summary(self, report=None):
+        """사람이 읽는 요약 문자열"""
+        if report is None:
+            report = self.report()
+        api = report['api']
+        lines = [f"⏱ 전체 {report['duration_seconds']:.1f}초"]
+        for name, stage in sorted(report['stages'].items(), key=lambda kv: kv[1]['started_at']):
+            extra = ', '.join(f"{k}={v}" for k, v in stage.items() if k not in ('started_at', 'seconds'))
+            seconds = stage['seconds'] if stage['seconds'] is not None else float('nan')
+            lines.append(f"   - {name:<18} {seconds:7.2f}초" + (f"  ({extra})" if extra else ''))
+        lines.append(
+            f"🌐 API {api['calls']}건 (네트워크 {api['network_calls']} / 캐시 {api['cache_hits']} / 공유 {api['coalesced']}), "
+            f"재시도 {api['retries']}회, 실패 {api['failures']}건, "
+            f"{api['bytes'] / 1024:.1f} KB, 상품 {api['items']}개"
+        )
+        if api['latency_ms_p50'] is not None:
+            lines.append(f"   지연 시간 p50 {api['latency_ms_p50']}ms / p95 {api['latency_ms_p95']}ms / "
+                         f"최대 {api['latency_ms_max']}ms, 상태 {api['status_counts']}")
+            lines.append(f"   속도 제한 대기 {api['queue_ms_total'] / 1000:.1f}초, "
+                         f"재시도 백오프 {api['backoff_ms_total'] / 1000:.1f}초 (지연 시간에 미포함)")
+        return '\n'.join(lines)
+
@@ -0,0 +1,295 @@
+"""
+쿠팡 파트너스 API 로컬 목(mock) 서버
+CoupangApiHandler가 쓰는 엔드포인트(goldbox / bestcategories / events / events/special)를 흉내 내며,
+CEA HMAC 서명을 검증하고 고정 데이터(fixture) 또는 합성 데이터를 응답합니다.
+지연 시간, 504/429 발생 비율, 액세스 키별 호출 속도 제한을 설정해
+실제 키나 운영 API 한도 없이 재시도/동시성/캐시 동작을 부하 테스트할 수 있습니다.
+
+사용법:
+    python mock_coupang_server.py --port 8765 --latency-ms 300 --rate-504 0.05 --rate-429 0.02 --rate-limit 5
+    COUPANG_API_BASE_URL=http://127.0.0.1:8765 COUPANG_ACCESS_KEY=mock-access \\
+        COUPANG_SECRET_KEY=mock-secret COUPANG_CHANNEL_ID=mock python make_html.py --no-cache
+"""
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from coupang_api import TokenBucket
+from benchmark import generate_products
+
+API_PREFIX = '/v2/providers/affiliate_open_api/apis/openapi/v1'
+
+# 서명 시각 허용 오차 (초)
+SIGNATURE_MAX_SKEW = 5 * 60
+
+AUTH_PATTERN = re.compile(
+    r'CEA algorithm=HmacSHA256, access-key=(?P<access_key>[^,]+), '
+    r'signed-date=(?P<signed_date>\d{6}T\d{6}Z), signature=(?P<signature>[0-9a-f]+)'
+)
+
+ROUTES = [
+    (re.compile(rf'^{API_PREFIX}/products/goldbox$'), 'goldbox'),
+    (re.compile(rf'^{API_PREFIX}/products/bestcategories/(?P<id>\d+)$'), 'bestcategories'),
+    (re.compile(rf'^{API_PREFIX}/events$'), 'events'),
+    (re.compile(rf'^{API_PREFIX}/events/special/(?P<id>\d+)/products$'), 'event_products'),
+]
+
+
+class MockConfig:
+    """목 서버 동작 설정"""
+
+    def __init__(self, keys=None, fixtures_dir=None, items_per_list=50, catalog_size=500, event_count=5,
+                 latency_ms=0, jitter_ms=0, rate_504=0.0, rate_429=0.0,
+                 rate_limit=0.0, rate_burst=5, seed=42):
+        # 액세스 키 → 시크릿 키
+        self.keys = keys or {'mock-access': 'mock-secret'}
+        self.fixtures_dir = fixtures_dir
+        self.items_per_list = items_per_list
+        self.catalog_size = catalog_size
+        self.event_count = event_count
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_504 = rate_504
+        self.rate_429 = rate_429
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.seed = seed
+
+
+class MockState:
+    """서버 전체가 공유하는 상태 (키별 속도 제한기, 호출 통계)"""
+
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.buckets = {}
+        self.stats = {'requests': 0, 'ok': 0, 'auth_failed': 0, 'not_found': 0,
+                      'injected_504': 0, 'injected_429': 0, 'rate_limited': 0, 'by_route': {}}
+        self.lock = threading.Lock()
+
+    def count(self, key, route=None):
+        with self.lock:
+            self.stats[key] += 1
+            if route:
+                self.stats['by_route'][route] = self.stats['by_route'].get(route, 0) + 1
+
+    def roll(self, probability):
+        with self.lock:
+            return self.random.random() < probability
+
+    def bucket_for(self, access_key):
+        with self.lock:
+            if access_key not in self.buckets:
+                self.buckets[access_key] = TokenBucket(self.config.rate_limit, self.config.rate_burst)
+            return self.buckets[access_key]
+
+
+def verify_signature(keys, authorization, method, path, query, now=None):
+    """CEA HMAC 헤더 검증, (성공 여부, 액세스 키 또는 실패 사유) 반환"""
+    match = AUTH_PATTERN.fullmatch((authorization or '').strip())
+    if not match:
+        return False, 'invalid authorization header'
+    access_key = match.group('access_key')
+    secret_key = keys.get(access_key)
+    if secret_key is None:
+        return False, 'unknown access key'
+
+    signed_date = match.group('signed_date')
+    signed_at = datetime.strptime(signed_date, '%y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc).timestamp()
+    if abs((now or time.time()) - signed_at) > SIGNATURE_MAX_SKEW:
+        return False, 'signed-date out of range'
+
+    message = signed_date + method + path + query
+    expected = hmac.new(secret_key.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, match.group('signature')):
+        return False, 'signature mismatch'
+    return True, access_key
+
+
+def _load_fixture(config, name):
+    """fixtures_dir/{name}.json이 있으면 data 목록 반환"""
+    if not config.fixtures_dir:
+        return None
+    file_path = os.path.join(config.fixtures_dir, f"{name}.json")
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8') as f:
+        payload = json.load(f)
+    return payload.get('data', payload) if isinstance(payload, dict) else payload
+
+
+def route_data(config, route, params, query_params):
+    """라우트별 응답 data (고정 데이터 우선, 없으면 합성 데이터)"""
+    limit = int(query_params.get('limit', [config.items_per_list])[0])
+    if route == 'goldbox':
+        data = _load_fixture(config, 'goldbox')
+        return data if data is not None else generate_products(limit, seed=config.seed)
+    if route == 'bestcategories':
+        category_id = params['id']
+        data = _load_fixture(config, f"bestcategories_{category_id}")
+        if data is not None:
+            return data
+        # page 파라미터 지원 (카테고리당 catalog_size개까지)
+        offset = (int(query_params.get('page', ['1'])[0]) - 1) * limit
+        count = max(0, min(limit, config.catalog_size - offset))
+        return generate_products(count, seed=config.seed + int(category_id) + offset,
+                                 id_offset=int(category_id) * 100_000 + offset)
+    if route == 'events':
+        data = _load_fixture(config, 'events')
+        if data is not None:
+            return data
+        return [{'eventId': 9000 + i, 'eventName': f'기획전 {i + 1}',
+                 'eventUrl': f'https://link.coupang.com/a/event{9000 + i}'}
+                for i in range(config.event_count)]
+    if route == 'event_products':
+        event_id = params['id']
+        data = _load_fixture(config, f"event_{event_id}")
+        return data if data is not None else generate_products(limit, seed=config.seed + int(event_id),
+                                                               id_offset=int(event_id) * 100_000)
+    return None
+
+
+class MockCoupangHandler(BaseHTTPRequestHandler):
+    """목 API 요청 처리기"""
+
+    server_version = 'MockCoupang/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.server.state
+        config = state.config
+        parts = urlsplit(self.path)
+
+        if parts.path == '/__stats':
+            with state.lock:
+                self._send_json(200, state.stats)
+            return
+
+        state.count('requests')
+
+        route, params = None, {}
+        for pattern, name in ROUTES:
+            match = pattern.match(parts.path)
+            if match:
+                route, params = name, match.groupdict()
+                break
+        if route is None:
+            state.count('not_found')
+            self._send_json(404, {'rCode': '404', 'rMessage': 'not found'})
+            return
+
+        ok, detail = verify_signature(config.keys, self.headers.get('Authorization'),
+                                      'GET', parts.path, parts.query)
+        if not ok:
+            state.count('auth_failed')
+            self._send_json(401, {'rCode': '401', 'rMessage': detail})
+            return
+
+        # 액세스 키별 호출 속도 제한
+        if config.rate_limit > 0:
+            allowed, retry_after = state.bucket_for(detail).try_acquire()
+            if not allowed:
+                state.count('rate_limited')
+                self._send_json(429, {'rCode': '429', 'rMessage': 'rate limit exceeded'},
+                                {'Retry-After': f"{retry_after:.2f}"})
+                return
+
+        # 지연 시간 + 장애 주입
+        delay_ms = config.latency_ms + (random.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        if config.rate_504 and state.roll(config.rate_504):
+            state.count('injected_504')
+            self._send_json(504, {'rCode': '504', 'rMessage': 'Gateway Timeout'})
+            return
+        if config.rate_429 and state.roll(config.rate_429):
+            state.count('injected_429')
+            self._send_json(429, {'rCode': '429', 'rMessage': 'Too Many Requests'}, {'Retry-After': '1'})
+            return
+
+        data = route_data(config, route, params, parse_qs(parts.query))
+        state.count('ok', route)
+        self._send_json(200, {'rCode': '0', 'rMessage': '', 'data': data})
+
+
+def create_mock_server(config=None, host='127.0.0.1', port=0, verbose=False):
+    """목 서버 생성 (port=0이면 빈 포트 자동 할당)"""
+    server = ThreadingHTTPServer((host, port), MockCoupangHandler)
+    server.state = MockState(config or MockConfig())
+    server.verbose = verbose
+    server.daemon_threads = True
+    return server
+
+
+def start_mock_server(config=None, host='127.0.0.1', port=0, verbose=False):
+    """백그라운드 스레드에서 목 서버 실행 후 (server, base_url) 반환 (테스트/부하 측정용)"""
+    server = create_mock_server(config, host, port, verbose)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="쿠팡 파트너스 API 로컬 목 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--access-key', default='mock-access')
+    parser.add_argument('--secret-key', default='mock-secret')
+    parser.add_argument('--fixtures', help="goldbox.json, bestcategories_{id}.json, events.json, event_{id}.json 디렉터리")
+    parser.add_argument('--items', type=int, default=50, help="목록당 합성 상품 수 (limit 쿼리가 우선)")
+    parser.add_argument('--catalog-size', type=int, default=500, help="카테고리별 전체 합성 상품 수 (page 파라미터로 나눠 응답)")
+    parser.add_argument('--events', type=int, default=5, help="합성 기획전 수")
+    parser.add_argument('--latency-ms', type=float, default=0, help="응답 지연 (ms)")
+    parser.add_argument('--jitter-ms', type=float, default=0, help="응답 지연 편차 (ms)")
+    parser.add_argument('--rate-504', type=float, default=0.0, help="504 응답 비율 (0~1)")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="429 응답 비율 (0~1)")
+    parser.add_argument('--rate-limit', type=float, default=0.0, help="액세스 키별 초당 허용 호출 수 (0=무제한)")
+    parser.add_argument('--rate-burst', type=int, default=5, help="액세스 키별 버스트 허용량")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help="요청 로그 출력")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        keys={args.access_key: args.secret_key}, fixtures_dir=args.fixtures,
+        items_per_list=args.items, catalog_size=args.catalog_size, event_count=args.events,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        rate_504=args.rate_504, rate_429=args.rate_429,
+        rate_limit=args.rate_limit, rate_burst=args.rate_burst, seed=args.seed,
+    )
+    server = create_mock_server(config, args.host, args.port, args.verbose)
+    base_url = f"http://{args.host}:{server.server_port}"
+    print(f"🧪 쿠팡 API 목 서버 실행 중: {base_url} (통계: {base_url}/__stats)")
+    print(f"   COUPANG_API_BASE_URL={base_url} COUPANG_ACCESS_KEY={args.access_key} "
+          f"COUPANG_SECRET_KEY={args.secret_key} COUPANG_CHANNEL_ID=mock python make_html.py --no-cache")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 목 서버 종료")
+        server.server_close()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
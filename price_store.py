@@ -0,0 +1,470 @@
+"""
+SQLite 기반 가격 기록 저장소
+price_history.json 전체를 매번 읽고 다시 쓰는 대신,
+이번 실행에서 본 상품만 조회하고 새로 관측한 가격만 기록합니다.
+
+- products: 상품별 집계 레코드 (최저가/최저가 시각/마지막 가격/관측 횟수) → 역대 최저가 판정 O(1)
+- price_runs: 가격이 바뀔 때만 추가되는 (가격, 처음 본 시각, 마지막 본 시각) 구간 기록
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+from datetime import datetime, timezone
+from itertools import groupby
+
+# 가격 기록 DB 파일
+DB_FILE = 'price_history.db'
+# 이전 JSON 형식 가격 기록 파일 (1회 이관 대상)
+LEGACY_JSON_FILE = 'price_history.json'
+# JSON 기록 이관 완료 표시 (applied_segments에 세그먼트 이름 대신 기록)
+LEGACY_IMPORT_MARKER = 'legacy:price_history.json'
+
+# 실행별 추가 전용 가격 기록 세그먼트 디렉터리
+SEGMENT_DIR = 'price_segments'
+
+# SQLite IN 절 변수 개수 제한을 피하기 위한 조회 단위
+QUERY_CHUNK_SIZE = 500
+
+# 보존 정책 기본값
+RETENTION_EVICT_AFTER_DAYS = int(os.getenv('PRICE_EVICT_AFTER_DAYS', '30'))
+RETENTION_DOWNSAMPLE_AFTER_DAYS = int(os.getenv('PRICE_DOWNSAMPLE_AFTER_DAYS', '14'))
+RETENTION_DOWNSAMPLE_BUCKET = os.getenv('PRICE_DOWNSAMPLE_BUCKET', 'daily')  # 'daily' 또는 'weekly'
+RETENTION_MAX_PRODUCTS = int(os.getenv('PRICE_MAX_PRODUCTS', '50000'))
+
+BUCKET_SECONDS = {'daily': 24 * 60 * 60, 'weekly': 7 * 24 * 60 * 60}
+
+RECORD_FIELDS = ('min_price', 'min_ts', 'last_price', 'first_seen', 'last_seen', 'obs_count')
+
+
+def observe_price(db, product_id, price, ts=None):
+    """
+    상품 가격 1건을 집계 레코드에 반영하고 역대 최저가 여부 반환
+    처음 보는 상품은 첫 가격이 곧 역대 최저가
+    마지막 관측보다 이른 시각의 가격(늦게 병합된 세그먼트)은 최저가/관측 횟수에만 반영
+    """
+    if ts is None:
+        ts = int(time.time())
+    record = db.get(product_id)
+    if record is None:
+        db[product_id] = {
+            'min_price': price, 'min_ts': ts,
+            'last_price': price, 'first_seen': ts, 'last_seen': ts,
+            'obs_count': 1, 'observed': True,
+        }
+        return True
+
+    is_all_time_low = price < record['min_price']
+    if is_all_time_low:
+        record['min_price'] = price
+        record['min_ts'] = ts
+    if ts >= record['last_seen']:
+        record['last_price'] = price
+        record['last_seen'] = ts
+    record['obs_count'] += 1
+    record['observed'] = True
+    return is_all_time_low
+
+
+def _compact_runs(observations):
+    """시각순 (ts, price) 목록을 (price, first_seen, last_seen) 구간 목록으로 압축"""
+    runs = []
+    for ts, price in observations:
+        if runs and runs[-1][0] == price:
+            runs[-1][2] = ts
+        else:
+            runs.append([price, ts, ts])
+    return runs
+
+
+class RetentionPolicy:
+    """
+    가격 기록 보존 정책
+    - evict_after_days: 이 기간 동안 보이지 않은 상품 삭제
+    - downsample_after_days: 이보다 오래된 가격 구간은 하루(또는 일주일) 단위 최저가로 병합
+    - max_products: 추적 상품 수 상한 (초과 시 마지막으로 본 시각이 오래된 순으로 삭제)
+    """
+
+    def __init__(self, evict_after_days=RETENTION_EVICT_AFTER_DAYS,
+                 downsample_after_days=RETENTION_DOWNSAMPLE_AFTER_DAYS,
+                 downsample_bucket=RETENTION_DOWNSAMPLE_BUCKET,
+                 max_products=RETENTION_MAX_PRODUCTS):
+        if downsample_bucket not in BUCKET_SECONDS:
+            raise ValueError(f"지원하지 않는 다운샘플 단위입니다: {downsample_bucket}")
+        self.evict_after_days = evict_after_days
+        self.downsample_after_days = downsample_after_days
+        self.downsample_bucket = downsample_bucket
+        self.max_products = max_products
+
+
+class PriceHistoryStore:
+    """집계 레코드 + 구간 압축 기록을 저장하는 WAL 모드 SQLite 가격 기록 저장소"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                product_id TEXT PRIMARY KEY,
+                min_price REAL NOT NULL,
+                min_ts INTEGER NOT NULL,
+                last_price REAL NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL,
+                obs_count INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS price_runs (
+                product_id TEXT NOT NULL,
+                price REAL NOT NULL,
+                first_seen INTEGER NOT NULL,
+                last_seen INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_price_runs_product_ts ON price_runs (product_id, last_seen)"
+        )
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS applied_segments (
+                name TEXT PRIMARY KEY,
+                applied_at INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._migrate_raw_history()
+        # 상품별로 DB에서 읽어온 마지막 (가격, 시각) - 저장 시 구간 연장/추가 판단용
+        self.loaded = {}
+
+    def _migrate_raw_history(self):
+        """관측값을 한 행씩 쌓던 이전 price_history 테이블을 집계 + 구간 형식으로 변환"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='price_history'"
+        ).fetchone()
+        if not exists:
+            return
+        rows = self.conn.execute("SELECT product_id, ts, price FROM price_history ORDER BY product_id, ts")
+        grouped = ((pid, [(ts, price) for _, ts, price in group]) for pid, group in groupby(rows, key=lambda r: r[0]))
+        migrated = self._import_observations(grouped)
+        with self.conn:
+            self.conn.execute("DROP TABLE price_history")
+        print(f"  ✓ 이전 가격 기록 테이블을 구간 압축 형식으로 변환했습니다. ({migrated}개 상품)")
+
+    def _existing_products(self, product_ids):
+        """주어진 상품 ID 중 이미 저장된 ID 집합"""
+        product_ids = list(product_ids)
+        existing = set()
+        for start in range(0, len(product_ids), QUERY_CHUNK_SIZE):
+            chunk = product_ids[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(f"SELECT product_id FROM products WHERE product_id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def _import_observations(self, grouped_observations, marker=None):
+        """
+        (product_id, [(ts, price), ...]) 목록을 집계 레코드와 구간으로 일괄 기록하고 기록한 상품 수 반환
+        이미 있는 상품은 건너뛰므로 같은 기록을 다시 넣어도 구간이 중복되거나 최신 집계가 덮어써지지 않음
+        marker가 주어지면 같은 트랜잭션에서 applied_segments에 이관 완료 표시
+        """
+        grouped_observations = [(product_id, observations) for product_id, observations in grouped_observations
+                                if observations]
+        existing = self._existing_products(product_id for product_id, _ in grouped_observations)
+        product_rows = []
+        run_rows = []
+        for product_id, observations in grouped_observations:
+            if product_id in existing:
+                continue
+            existing.add(product_id)
+            observations = sorted(observations)
+            min_ts, min_price = min(observations, key=lambda o: (o[1], o[0]))
+            product_rows.append((
+                product_id, min_price, min_ts, observations[-1][1],
+                observations[0][0], observations[-1][0], len(observations),
+            ))
+            run_rows.extend((product_id, price, first, last) for price, first, last in _compact_runs(observations))
+        with self.conn:
+            self.conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)", product_rows)
+            self.conn.executemany("INSERT INTO price_runs VALUES (?, ?, ?, ?)", run_rows)
+            if marker is not None:
+                self.conn.execute("INSERT INTO applied_segments VALUES (?, ?)", (marker, int(time.time())))
+        return len(product_rows)
+
+    def count_products(self):
+        """저장된 전체 상품 수"""
+        return self.conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def load(self, product_ids, db):
+        """주어진 상품들의 집계 레코드만 읽어 db[product_id]에 채움"""
+        pending = [pid for pid in {str(pid) for pid in product_ids if pid} if pid not in db]
+        for start in range(0, len(pending), QUERY_CHUNK_SIZE):
+            chunk = pending[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT product_id, {', '.join(RECORD_FIELDS)} FROM products WHERE product_id IN ({placeholders})",
+                chunk,
+            )
+            for row in rows:
+                record = dict(zip(RECORD_FIELDS, row[1:]))
+                record['observed'] = False
+                db[row[0]] = record
+                self.loaded[row[0]] = (record['last_price'], record['last_seen'])
+        return db
+
+    def price_change_stats(self, product_ids, since_ts):
+        """
+        since_ts 이후 가격 구간 기록으로 상품별 (가격 변경 횟수, 관측 기간 초) 조회
+        구간 n개 = 가격 변경 n-1회, 관측 기간은 첫 구간 시작부터 마지막 구간 끝까지
+        """
+        stats = {}
+        pending = list({str(pid) for pid in product_ids if pid})
+        for start in range(0, len(pending), QUERY_CHUNK_SIZE):
+            chunk = pending[start:start + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT product_id, COUNT(*), MIN(first_seen), MAX(last_seen) FROM price_runs "
+                f"WHERE product_id IN ({placeholders}) AND last_seen >= ? GROUP BY product_id",
+                chunk + [since_ts],
+            )
+            for product_id, runs, first_seen, last_seen in rows:
+                stats[product_id] = (runs - 1, last_seen - max(first_seen, since_ts))
+        return stats
+
+    def save(self, db, segment_name=None):
+        """
+        이번 실행에서 관측된 상품만 기록하고, 새로 추가한 가격 구간 수 반환
+        segment_name을 주면 같은 트랜잭션에서 적용 완료로 표시 (중복 적용 방지)
+        """
+        product_rows = []
+        new_runs = []
+        extended_runs = []
+        for product_id, record in db.items():
+            if not record.get('observed'):
+                continue
+            product_rows.append((product_id,) + tuple(record[field] for field in RECORD_FIELDS))
+            previous = self.loaded.get(product_id)
+            if previous is not None and previous[0] == record['last_price']:
+                # 가격이 그대로면 마지막 구간의 끝 시각만 연장
+                extended_runs.append((record['last_seen'], product_id, previous[1]))
+            else:
+                first_seen = record['first_seen'] if previous is None else record['last_seen']
+                new_runs.append((product_id, record['last_price'], first_seen, record['last_seen']))
+            self.loaded[product_id] = (record['last_price'], record['last_seen'])
+            record['observed'] = False
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?)", product_rows)
+            self.conn.executemany(
+                "UPDATE price_runs SET last_seen = ? WHERE product_id = ? AND last_seen = ?", extended_runs
+            )
+            self.conn.executemany("INSERT INTO price_runs VALUES (?, ?, ?, ?)", new_runs)
+            if segment_name is not None:
+                self.conn.execute(
+                    "INSERT INTO applied_segments VALUES (?, ?)", (segment_name, int(time.time()))
+                )
+        return len(new_runs)
+
+    def is_segment_applied(self, segment_name):
+        """세그먼트가 이미 병합되었는지 여부"""
+        return self.conn.execute(
+            "SELECT 1 FROM applied_segments WHERE name = ?", (segment_name,)
+        ).fetchone() is not None
+
+    def apply_segment(self, segment_name, observations):
+        """세그먼트 1개의 관측값을 시각순으로 반영하고 새 가격 구간 수 반환"""
+        db = {}
+        self.load((product_id for product_id, _, _ in observations), db)
+        for product_id, ts, price in sorted(observations, key=lambda o: (o[1], o[0], o[2])):
+            observe_price(db, product_id, price, ts)
+        return self.save(db, segment_name=segment_name)
+
+    def apply_retention(self, policy, now=None):
+        """
+        보존 정책을 적용하고 결과 보고서 반환
+        이번 실행에서 관측한 상품은 last_seen이 최신이므로 삭제 대상이 되지 않음 (save 이후 호출)
+        """
+        if now is None:
+            now = int(time.time())
+        report = {'stale_evicted': 0, 'lru_evicted': 0, 'runs_downsampled': 0, 'runs_removed': 0}
+
+        with self.conn:
+            # 1. N일 이상 보이지 않은 상품 삭제
+            if policy.evict_after_days > 0:
+                cutoff = now - policy.evict_after_days * 24 * 60 * 60
+                report['stale_evicted'] = self.conn.execute(
+                    "DELETE FROM products WHERE last_seen < ?", (cutoff,)
+                ).rowcount
+
+            # 2. 추적 상품 수 상한 초과분을 오래된 순(LRU)으로 삭제
+            if policy.max_products > 0:
+                overflow = self.count_products() - policy.max_products
+                if overflow > 0:
+                    report['lru_evicted'] = self.conn.execute(
+                        "DELETE FROM products WHERE product_id IN "
+                        "(SELECT product_id FROM products ORDER BY last_seen ASC LIMIT ?)",
+                        (overflow,),
+                    ).rowcount
+
+            # 삭제된 상품의 가격 구간 정리
+            report['runs_removed'] = self.conn.execute(
+                "DELETE FROM price_runs WHERE product_id NOT IN (SELECT product_id FROM products)"
+            ).rowcount
+
+            # 3. 오래된 가격 구간을 하루/일주일 단위 최저가로 병합 (상품의 마지막 구간은 유지)
+            if policy.downsample_after_days > 0:
+                cutoff = now - policy.downsample_after_days * 24 * 60 * 60
+                bucket = BUCKET_SECONDS[policy.downsample_bucket]
+                merged = self.conn.execute(
+                    """
+                    SELECT r.product_id, r.first_seen / ? AS bucket,
+                           MIN(r.price), MIN(r.first_seen), MAX(r.last_seen), COUNT(*)
+                    FROM price_runs r JOIN products p ON p.product_id = r.product_id
+                    WHERE r.last_seen < ? AND r.last_seen < p.last_seen
+                    GROUP BY r.product_id, bucket
+                    HAVING COUNT(*) > 1
+                    """,
+                    (bucket, cutoff),
+                ).fetchall()
+                self.conn.executemany(
+                    "DELETE FROM price_runs WHERE product_id = ? AND first_seen / ? = ? "
+                    "AND last_seen < ? AND last_seen < (SELECT last_seen FROM products WHERE product_id = ?)",
+                    [(pid, bucket, bucket_no, cutoff, pid) for pid, bucket_no, _, _, _, _ in merged],
+                )
+                self.conn.executemany(
+                    "INSERT INTO price_runs VALUES (?, ?, ?, ?)",
+                    [(pid, price, first, last) for pid, _, price, first, last, _ in merged],
+                )
+                report['runs_downsampled'] = sum(count for *_, count in merged) - len(merged)
+
+        return report
+
+    def import_json(self, json_path=LEGACY_JSON_FILE):
+        """
+        기존 price_history.json을 1회 이관하고 이관한 상품 수 반환
+        JSON 기록에는 시각이 없으므로 파일 수정 시각에서 1시간 간격으로 역산하여 ts 부여
+        이미 이관했거나 가격 기록이 있는 DB에는 이관하지 않음 (ValueError) - 더 최신 관측을 잃지 않도록
+        """
+        if self.is_segment_applied(LEGACY_IMPORT_MARKER):
+            raise ValueError(f"{self.path}에는 이미 JSON 가격 기록을 이관했습니다.")
+        if self.count_products():
+            raise ValueError(f"{self.path}에 가격 기록이 있어 JSON 기록을 이관하지 않습니다.")
+        with open(json_path, 'r', encoding='utf-8') as f:
+            legacy_db = json.load(f)
+        end_ts = int(os.path.getmtime(json_path))
+
+        def grouped():
+            for product_id, record in legacy_db.items():
+                history = record.get('history', [])
+                count = len(history)
+                yield str(product_id), [
+                    (end_ts - (count - 1 - i) * 3600, float(price)) for i, price in enumerate(history)
+                ]
+
+        return self._import_observations(grouped(), marker=LEGACY_IMPORT_MARKER)
+
+    def close(self):
+        """WAL 내용을 본 DB 파일에 반영하고 연결 종료"""
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.close()
+
+
+def write_segment(db, segment_dir=SEGMENT_DIR, run_id=None):
+    """
+    이번 실행에서 관측된 가격을 추가 전용 세그먼트 파일(JSON Lines)로 기록하고 경로 반환
+    파일 이름은 '생성 시각-실행 ID'라 동시에 실행된 빌드끼리 겹치지 않고, 이름순이 곧 시간순
+    """
+    if run_id is None:
+        run_id = os.getenv('GITHUB_RUN_ID', '') or uuid.uuid4().hex[:12]
+        if os.getenv('GITHUB_RUN_ATTEMPT'):
+            run_id += f"-{os.environ['GITHUB_RUN_ATTEMPT']}"
+    os.makedirs(segment_dir, exist_ok=True)
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{run_id}.jsonl"
+    file_path = os.path.join(segment_dir, name)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for product_id in sorted(db):
+            record = db[product_id]
+            if record.get('observed'):
+                f.write(json.dumps({'product_id': product_id, 'ts': record['last_seen'],
+                                    'price': record['last_price']}) + '\n')
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+def read_segment(file_path):
+    """세그먼트 파일을 (product_id, ts, price) 목록으로 읽기"""
+    observations = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                observations.append((str(entry['product_id']), int(entry['ts']), float(entry['price'])))
+    return observations
+
+
+def compact_segments(store, segment_dir=SEGMENT_DIR, policy=None, prune=False):
+    """
+    아직 병합되지 않은 세그먼트를 이름순으로 저장소에 병합 (결정적 + 멱등)
+    prune=True면 병합이 끝난 세그먼트 파일 삭제 (저장소 DB를 커밋하는 압축 작업에서만 사용)
+    """
+    report = {'segments_applied': 0, 'observations': 0, 'new_runs': 0, 'segments_pruned': 0}
+    if os.path.isdir(segment_dir):
+        names = sorted(name for name in os.listdir(segment_dir) if name.endswith('.jsonl'))
+    else:
+        names = []
+    for name in names:
+        file_path = os.path.join(segment_dir, name)
+        if not store.is_segment_applied(name):
+            observations = read_segment(file_path)
+            report['new_runs'] += store.apply_segment(name, observations)
+            report['observations'] += len(observations)
+            report['segments_applied'] += 1
+        if prune:
+            os.remove(file_path)
+            report['segments_pruned'] += 1
+    if policy is not None:
+        report.update(store.apply_retention(policy))
+    return report
+
+
+def open_price_store(path=DB_FILE, legacy_json_path=LEGACY_JSON_FILE):
+    """저장소를 열고, DB가 처음 만들어지는 경우 기존 JSON 기록을 자동 이관"""
+    is_new = not os.path.exists(path)
+    store = PriceHistoryStore(path)
+    if is_new and os.path.exists(legacy_json_path):
+        imported = store.import_json(legacy_json_path)
+        print(f"  ✓ {legacy_json_path}에서 {imported}개 상품의 가격 기록을 이관했습니다.")
+    return store
+
+
+if __name__ == "__main__":
+    # 사용법:
+    #   python price_store.py import [price_history.json] [price_history.db]
+    #   python price_store.py compact [--prune]
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'import':
+        json_path = sys.argv[2] if len(sys.argv) > 2 else LEGACY_JSON_FILE
+        db_path = sys.argv[3] if len(sys.argv) > 3 else DB_FILE
+        store = PriceHistoryStore(db_path)
+        try:
+            imported = store.import_json(json_path)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            store.close()
+        print(f"✅ {json_path} → {db_path}: {imported}개 상품 이관 완료")
+    elif command == 'compact':
+        store = open_price_store(DB_FILE)
+        report = compact_segments(store, policy=RetentionPolicy(), prune='--prune' in sys.argv)
+        store.close()
+        print(f"✅ 세그먼트 {report['segments_applied']}개 병합 (관측 {report['observations']}건, "
+              f"새 가격 구간 {report['new_runs']}건), 세그먼트 파일 {report['segments_pruned']}개 정리")
+        print(f"   보존 정책: 미관측 상품 {report['stale_evicted']}개, 상한 초과 상품 {report['lru_evicted']}개 삭제, "
+              f"가격 구간 {report['runs_removed']}건 삭제 / {report['runs_downsampled']}건 병합")
+    else:
+        print("사용법: python price_store.py import [JSON 파일] [DB 파일] | compact [--prune]", file=sys.stderr)
+        sys.exit(1)
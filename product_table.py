@@ -0,0 +1,128 @@
+"""
+실행 단위 상품 테이블
+골드박스/베스트셀러/카테고리에 같은 productId가 여러 번 나와도 상품당 한 번만 정규화하고
+가격도 실행당 한 번만 관측해, 가격 기록이 중복되거나 역대 최저가 판정이 섹션마다 달라지지 않게 합니다.
+각 섹션은 상품 ID 목록만 들고 있다가 렌더링할 때 테이블에서 레코드를 꺼냅니다.
+"""
+from price_store import observe_price
+from site_build import CARD_FIELDS
+
+# 테이블에 남기는 상품 필드 (카드 렌더링 필드 + 분류/배송 정보)
+PRODUCT_FIELDS = CARD_FIELDS + ('categoryName', 'isRocket', 'isFreeShipping')
+
+
+def product_key(item):
+    """테이블 키로 쓰는 상품 ID 문자열 (ID가 없으면 '')"""
+    product_id = item.get('productId')
+    return '' if product_id is None else str(product_id)
+
+
+def normalize_products(product_list):
+    """할인율 계산 및 가격 필터링 후 조건에 맞는 상품을 하나씩 내보내는 제너레이터"""
+    for item in product_list:
+        # API 응답 필드명이 다를 수 있으므로 여러 필드명 시도
+        original_price = item.get('originalPrice', 0) or item.get('productPrice', 0) or 0
+        sale_price = item.get('salePrice', 0) or item.get('productPrice', 0) or 0
+        
+        # 숫자로 변환 시도
+        try:
+            original_price = float(original_price) if original_price else 0
+            sale_price = float(sale_price) if sale_price else 0
+        except (ValueError, TypeError):
+            original_price = 0
+            sale_price = 0
+        
+        # originalPrice가 0이거나 salePrice보다 낮으면 제외
+        # 단, originalPrice가 없고 salePrice만 있는 경우는 허용 (할인율 계산 없이)
+        if original_price <= 0:
+            # originalPrice가 없으면 salePrice를 originalPrice로 사용
+            if sale_price > 0:
+                original_price = sale_price
+            else:
+                continue
+        
+        if original_price < sale_price:
+            continue
+        
+        # 할인율 계산
+        discount_rate = round(((original_price - sale_price) / original_price) * 100)
+        item['discountRate'] = discount_rate
+        item['originalPrice'] = original_price
+        item['salePrice'] = sale_price
+        yield item
+
+def track_all_time_lows(items, db):
+    """가격 기록을 갱신하며 역대 최저가 여부(isAllTimeLow)를 표시하는 제너레이터"""
+    for item in items:
+        # 역대 최저가 기록 및 비교 (집계 레코드의 최저가와 비교하므로 O(1))
+        product_id = str(item.get('productId', ''))
+        is_all_time_low = False
+        
+        if product_id:
+            is_all_time_low = observe_price(db, product_id, item['salePrice'])
+        
+        item['isAllTimeLow'] = is_all_time_low
+        yield item
+
+
+class ProductTable:
+    """
+    productId → 정규화된 상품 레코드 (PRODUCT_FIELDS만 보관)
+    가격 기록은 처음 등장할 때 한 번만 불러오고 관측하며, 이후 등장은 같은 레코드를 재사용
+    """
+
+    def __init__(self, price_store, db):
+        self.price_store = price_store
+        self.db = db
+        self.products = {}
+        # 가격 조건(originalPrice >= salePrice 등)을 통과하지 못한 상품 ID
+        self.rejected = set()
+        self.stats = {'unique': 0, 'duplicates': 0, 'rejected': 0}
+
+    def add(self, items):
+        """
+        상품 묶음을 테이블에 반영하고 조건을 통과한 상품 ID 목록 반환 (입력 순서 유지, 중복 제외)
+        처음 보는 상품만 가격 기록을 조회/갱신
+        """
+        new_items = []
+        new_ids = set()
+        for item in items:
+            product_id = product_key(item)
+            if not product_id:
+                # ID가 없으면 섹션에서 참조할 수 없으므로 제외
+                self.stats['rejected'] += 1
+                continue
+            if product_id in self.products or product_id in self.rejected or product_id in new_ids:
+                self.stats['duplicates'] += 1
+                continue
+            new_ids.add(product_id)
+            new_items.append(item)
+
+        self.price_store.load((item.get('productId') for item in new_items), self.db)
+        for item in track_all_time_lows(normalize_products(new_items), self.db):
+            self.products[product_key(item)] = {field: item.get(field) for field in PRODUCT_FIELDS}
+        for product_id in new_ids:
+            if product_id not in self.products:
+                self.rejected.add(product_id)
+                self.stats['rejected'] += 1
+        self.stats['unique'] = len(self.products)
+
+        ids = []
+        seen = set()
+        for item in items:
+            product_id = product_key(item)
+            if product_id in self.products and product_id not in seen:
+                seen.add(product_id)
+                ids.append(product_id)
+        return ids
+
+    def get(self, product_id):
+        return self.products.get(str(product_id))
+
+    def records(self, product_ids):
+        """상품 ID 목록 → 레코드 목록"""
+        return [self.products[product_id] for product_id in product_ids]
+
+    def by_discount(self, product_ids):
+        """할인율이 높은 순으로 정렬한 레코드 목록 (같은 할인율은 입력 순서 유지)"""
+        return sorted(self.records(product_ids), key=lambda x: x.get('discountRate', 0), reverse=True)
@@ -0,0 +1,97 @@
+"""
+카테고리별 적응형 갱신 주기
+가격 기록(price_runs)에서 카테고리 상품들의 시간당 가격 변경 빈도를 구해 카테고리마다 갱신 주기를 정하고,
+이번 실행에서는 주기가 돌아온 카테고리만 조회합니다. 나머지는 지난 빌드의 페이지/피드를 그대로 씁니다.
+가격이 자주 바뀌는 카테고리는 매시간, 거의 안 바뀌는 카테고리는 최대 REFRESH_MAX_HOURS마다 조회합니다.
+"""
+import os
+import json
+import time
+
+from site_build import write_atomic
+
+# 카테고리별 마지막 조회 시각/주기 파일 (워크플로 캐시로 다음 실행에 전달)
+SCHEDULE_FILE = os.getenv('REFRESH_SCHEDULE_FILE', '.cache/refresh_schedule.json')
+SCHEDULE_VERSION = 1
+# 갱신 주기 하한/상한 (시간)
+REFRESH_MIN_HOURS = float(os.getenv('REFRESH_MIN_HOURS', '1'))
+REFRESH_MAX_HOURS = float(os.getenv('REFRESH_MAX_HOURS', '12'))
+# 다음 조회까지 가격이 바뀌어 있을 것으로 기대하는 상품 비율 (작을수록 자주 조회)
+REFRESH_TARGET_CHANGE = float(os.getenv('REFRESH_TARGET_CHANGE', '0.1'))
+# 변경 빈도 계산에 쓰는 가격 기록 기간 (일)
+REFRESH_WINDOW_DAYS = int(os.getenv('REFRESH_WINDOW_DAYS', '7'))
+# 매시 정각 실행이 몇 분씩 늦게 시작해도 주기가 한 번 밀리지 않도록 두는 여유 (초)
+DUE_SLACK_SECONDS = 10 * 60
+
+
+def change_rate(stats):
+    """
+    {상품 ID: (가격 변경 횟수, 관측 기간 초)} → 상품 1개의 시간당 가격 변경 횟수
+    한 번만 관측된 상품은 제외하고, 계산할 기록이 없으면 None
+    """
+    changes = sum(count for count, span in stats.values() if span > 0)
+    hours = sum(span for _, span in stats.values() if span > 0) / 3600
+    if hours <= 0:
+        return None
+    return changes / hours
+
+
+def refresh_interval(rate):
+    """시간당 변경 빈도 → 갱신 주기 (시간, 기록이 없으면 가장 짧게)"""
+    if rate is None:
+        return REFRESH_MIN_HOURS
+    if rate <= 0:
+        return REFRESH_MAX_HOURS
+    return min(REFRESH_MAX_HOURS, max(REFRESH_MIN_HOURS, REFRESH_TARGET_CHANGE / rate))
+
+
+class RefreshScheduler:
+    """카테고리별 (마지막 조회 시각, 갱신 주기, 변경 빈도) 기록과 이번 실행의 조회 대상 결정"""
+
+    def __init__(self, price_store, path=SCHEDULE_FILE, now=None):
+        self.price_store = price_store
+        self.path = path
+        self.now = int(now if now is not None else time.time())
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.categories = data.get('categories', {}) if data.get('version') == SCHEDULE_VERSION else {}
+
+    def plan(self, category_products, always=()):
+        """
+        이번 실행에 조회할 카테고리 결정
+        category_products: {카테고리 ID: 지난 빌드의 상품 ID 목록 (지난 페이지가 없으면 None)}
+        always: 주기와 관계없이 조회할 카테고리 (다른 섹션이 어차피 같은 요청을 보내는 경우 등)
+        반환: (조회할 카테고리 ID 목록, 지난 빌드를 재사용할 카테고리 ID 목록) - 입력 순서 유지
+        """
+        since = self.now - REFRESH_WINDOW_DAYS * 86400
+        due, reuse = [], []
+        for category_id, product_ids in category_products.items():
+            entry = self.categories.setdefault(category_id, {})
+            rate = change_rate(self.price_store.price_change_stats(product_ids or [], since))
+            entry['rate'] = rate
+            entry['interval_hours'] = round(refresh_interval(rate), 2)
+            last_fetch = entry.get('last_fetch')
+            if (product_ids is None or category_id in always or last_fetch is None
+                    or self.now - last_fetch >= entry['interval_hours'] * 3600 - DUE_SLACK_SECONDS):
+                due.append(category_id)
+            else:
+                reuse.append(category_id)
+        return due, reuse
+
+    def next_due_hours(self, category_id):
+        """다음 조회까지 남은 시간 (시간)"""
+        entry = self.categories.get(category_id, {})
+        if entry.get('last_fetch') is None:
+            return 0.0
+        return max(0.0, (entry['last_fetch'] + entry['interval_hours'] * 3600 - self.now) / 3600)
+
+    def mark_fetched(self, category_id):
+        """이번 실행에서 조회에 성공한 카테고리 기록 (실패한 카테고리는 다음 실행에 다시 조회)"""
+        self.categories.setdefault(category_id, {})['last_fetch'] = self.now
+
+    def save(self):
+        write_atomic(self.path, json.dumps({'version': SCHEDULE_VERSION, 'categories': self.categories},
+                                           ensure_ascii=False, indent=1, sort_keys=True))
@@ -0,0 +1,155 @@
+"""
+쿠팡 API 응답 디스크 캐시
+method + path + query를 키로 응답 JSON을 저장하고, 엔드포인트별 TTL이 지나면 제거합니다.
+오프라인 모드에서는 TTL과 관계없이 캐시에 있는 응답만 재생합니다.
+응답 본문은 받는 대로 그대로 파일에 이어 쓰고, 읽을 때도 data 항목을 하나씩 꺼내
+전체 응답을 메모리에 올리지 않습니다.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+from json_stream import iter_json_items
+
+# 캐시 파일 읽기 단위 (바이트)
+READ_CHUNK_SIZE = 64 * 1024
+
+# 캐시 저장 디렉터리
+CACHE_DIR = os.getenv('COUPANG_CACHE_DIR', '.cache/api')
+
+# 엔드포인트별 TTL (초) - 경로에 포함된 문자열 기준, 먼저 매칭되는 항목 적용
+ENDPOINT_TTLS = [
+    ('/products/goldbox', 10 * 60),          # 골드박스: 자주 바뀜
+    ('/products/bestcategories/', 50 * 60),  # 카테고리 베스트: 매시간 크론 사이에 만료
+    ('/events', 6 * 60 * 60),                # 기획전: 거의 바뀌지 않음
+]
+
+
+def ttl_for_path(path):
+    """경로에 해당하는 TTL 반환 (캐시 대상이 아니면 0)"""
+    for pattern, ttl in ENDPOINT_TTLS:
+        if pattern in path:
+            return ttl
+    return 0
+
+
+def _normalize_query(query):
+    """subId(채널 추적 ID)는 응답 내용에 영향이 없으므로 키에서 제외"""
+    params = [p for p in query.split('&') if p and not p.startswith('subId=')]
+    return '&'.join(sorted(params))
+
+
+def _iter_file_items(file_path, meta):
+    """캐시 파일의 payload.data 항목 스트림 (헤더 필드는 첫 항목 전에 meta에 채워짐)"""
+    with open(file_path, 'rb') as f:
+        yield from iter_json_items(iter(lambda: f.read(READ_CHUNK_SIZE), b''), ('payload', 'data'), meta)
+
+
+def _prepend(first, items):
+    """미리 읽은 첫 항목을 다시 앞에 붙인 스트림"""
+    yield first
+    yield from items
+
+
+class _EntryWriter:
+    """
+    응답 본문 조각을 받는 대로 캐시 항목 파일에 기록
+    {"key", "stored_at", "expires_at"} 헤더 뒤에 본문을 payload로 이어 쓰며, commit 전까지는 임시 파일
+    """
+
+    def __init__(self, file_path, header):
+        self.file_path = file_path
+        self.tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.file = open(self.tmp_path, 'wb')
+        self.file.write(json.dumps(header, ensure_ascii=False)[:-1].encode('utf-8') + b', "payload": ')
+
+    def write(self, chunk):
+        self.file.write(chunk)
+
+    def commit(self):
+        """본문을 끝까지 받았을 때 호출 (항목 파일로 교체)"""
+        self.file.write(b'}')
+        self.file.close()
+        self.file = None
+        os.replace(self.tmp_path, self.file_path)
+
+    def discard(self):
+        """commit되지 않았으면 임시 파일 삭제 (중간에 끊긴 응답은 캐시하지 않음)"""
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class ResponseCache:
+    """엔드포인트별 TTL을 갖는 파일 기반 응답 캐시"""
+
+    def __init__(self, cache_dir=CACHE_DIR, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key_path(self, method, path, query):
+        key = f"{method} {path}?{_normalize_query(query)}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def open_items(self, method, path, query):
+        """캐시된 응답의 data 항목 스트림 반환 (없거나 만료되면 None)"""
+        file_path = self._key_path(method, path, query)
+        meta = {}
+        items = _iter_file_items(file_path, meta)
+        # 첫 항목까지 읽으면 앞에 기록된 만료 시각을 알 수 있음
+        try:
+            first = next(items, None)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not self.offline and time.time() >= meta.get('expires_at', 0):
+            items.close()
+            return None
+        if first is None:
+            return iter(())
+        return _prepend(first, items)
+
+    def open_writer(self, method, path, query):
+        """응답 본문을 조각 단위로 저장할 기록기 반환 (TTL이 0인 엔드포인트는 None)"""
+        ttl = ttl_for_path(path)
+        if ttl <= 0:
+            return None
+        now = time.time()
+        header = {
+            'key': f"{method} {path}?{_normalize_query(query)}",
+            'stored_at': now,
+            'expires_at': now + ttl,
+        }
+        return _EntryWriter(self._key_path(method, path, query), header)
+
+    def evict_expired(self):
+        """만료된 항목 삭제 후 삭제 개수 반환 (오프라인 모드에서는 유지)"""
+        if self.offline:
+            return 0
+        now = time.time()
+        evicted = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            file_path = os.path.join(self.cache_dir, name)
+            # 만료 시각은 파일 앞부분에 있으므로 첫 항목까지만 읽음
+            meta = {}
+            items = _iter_file_items(file_path, meta)
+            try:
+                next(items, None)
+            except (OSError, ValueError):
+                pass
+            items.close()
+            expires_at = meta.get('expires_at', 0)
+            if now >= expires_at:
+                os.remove(file_path)
+                evicted += 1
+        return evicted
@@ -0,0 +1,66 @@
+"""
+실행 간 상품 스냅샷 비교
+지난 실행의 (productId → 가격, 섹션) 맵만 작은 파일로 남겨 두고 이번 실행과 비교해
+새 상품 / 가격 인하 / 가격 인상 / 사라진 상품을 찾습니다. 가격 기록 전체를 다시 읽지 않습니다.
+"""
+import os
+import json
+
+from site_build import write_atomic
+
+# 지난 실행 스냅샷 파일 (워크플로 캐시로 다음 실행에 전달)
+SNAPSHOT_FILE = os.getenv('RUN_SNAPSHOT_FILE', '.cache/run_snapshot.json')
+SNAPSHOT_VERSION = 1
+
+
+def build_snapshot(sections):
+    """
+    섹션별 상품 레코드로 스냅샷 생성 {상품 ID: [판매가, 섹션]}
+    여러 섹션에 나오는 상품은 먼저 나온 섹션으로 기록
+    """
+    snapshot = {}
+    for section, records in sections.items():
+        for record in records:
+            product_id = str(record.get('productId'))
+            if product_id not in snapshot:
+                snapshot[product_id] = [record.get('salePrice'), section]
+    return snapshot
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """지난 실행 스냅샷 (없거나 형식이 다르면 None)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get('version') != SNAPSHOT_VERSION:
+        return None
+    return data.get('products', {})
+
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    write_atomic(path, json.dumps({'version': SNAPSHOT_VERSION, 'products': snapshot},
+                                  ensure_ascii=False, separators=(',', ':')))
+
+
+def diff_snapshots(previous, current):
+    """
+    두 스냅샷의 차이 (딕셔너리 조회만 하므로 O(상품 수))
+    반환: {'new': [ID], 'dropped': [(ID, 이전 가격, 현재 가격)], 'rose': [...], 'gone': [ID]}
+    dropped는 인하율이 큰 순, rose는 인상률이 큰 순
+    """
+    diff = {'new': [], 'dropped': [], 'rose': [], 'gone': []}
+    for product_id, (price, _) in current.items():
+        entry = previous.get(product_id)
+        if entry is None:
+            diff['new'].append(product_id)
+            continue
+        old_price = entry[0]
+        if not old_price or price is None or price == old_price:
+            continue
+        diff['dropped' if price < old_price else 'rose'].append((product_id, old_price, price))
+    diff['gone'] = [product_id for product_id in previous if product_id not in current]
+    diff['dropped'].sort(key=lambda change: change[2] / change[1])
+    diff['rose'].sort(key=lambda change: change[2] / change[1], reverse=True)
+    return diff
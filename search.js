@@ -0,0 +1,196 @@
+// 정적 상품 검색 (search_index.py가 만든 docs/search/ 색인 사용)
+// 정규화/토큰화/샤드 계산 규칙은 search_index.py와 같아야 함
+(function () {
+    'use strict';
+
+    var INDEX_VERSION = 2;
+    var INDEX_DIR = 'search/';
+    var MAX_RESULTS = 60;
+    var HANGUL_BASE = 0xAC00;
+    var HANGUL_LAST = 0xD7A3;
+    var CHOSEONG_SPAN = 21 * 28;
+
+    var shardCache = {};
+    var meta = null;
+
+    function fetchJson(name) {
+        if (!shardCache[name]) {
+            shardCache[name] = fetch(INDEX_DIR + name).then(function (response) {
+                return response.ok ? response.json() : {};
+            });
+        }
+        return shardCache[name];
+    }
+
+    function tokenize(text) {
+        return (text || '').normalize('NFKC').toLowerCase().match(/[0-9a-z가-힣]+/g) || [];
+    }
+
+    function ngrams(word) {
+        if (word.length <= 2) {
+            return [word];
+        }
+        var grams = [];
+        for (var i = 0; i < word.length - 1; i++) {
+            grams.push(word.slice(i, i + 2));
+        }
+        return grams;
+    }
+
+    function shardKey(gram) {
+        var code = gram.charCodeAt(0);
+        if (code >= HANGUL_BASE && code <= HANGUL_LAST) {
+            var number = Math.floor((code - HANGUL_BASE) / CHOSEONG_SPAN);
+            return 'h' + (number < 10 ? '0' : '') + number;
+        }
+        return gram.charAt(0);
+    }
+
+    // 2글자 검색어의 색인 파일 (큰 샤드는 둘째 글자 기준으로 나뉘어 있음)
+    function termFile(gram) {
+        var key = shardKey(gram);
+        if (meta.split_shards.indexOf(key) >= 0) {
+            key += '-' + shardKey(gram.charAt(1));
+        }
+        return meta.term_shards.indexOf(key) < 0 ? null : 't-' + key + '.json';
+    }
+
+    // 1글자 검색어의 색인 파일 (글자마다 할인율 상위 meta.unigram_limit개만 있음)
+    function unigramFile(gram) {
+        var key = shardKey(gram);
+        return meta.unigram_shards.indexOf(key) < 0 ? null : 'u-' + key + '.json';
+    }
+
+    function lookup(name, gram) {
+        if (!name) {
+            return Promise.resolve([]);
+        }
+        return fetchJson(name).then(function (shard) {
+            return shard[gram] || [];
+        });
+    }
+
+    function docShard(productId) {
+        var h = 0;
+        for (var i = 0; i < productId.length; i++) {
+            h = (Math.imul(h, 31) + productId.charCodeAt(i)) >>> 0;
+        }
+        return h % meta.doc_shards;
+    }
+
+    function intersect(lists) {
+        lists.sort(function (a, b) { return a.length - b.length; });
+        var result = lists[0];
+        for (var i = 1; i < lists.length && result.length; i++) {
+            var other = {};
+            lists[i].forEach(function (id) { other[id] = true; });
+            result = result.filter(function (id) { return other[id]; });
+        }
+        return result;
+    }
+
+    function search(query) {
+        var grams = [];
+        var chars = [];
+        tokenize(query).forEach(function (word) {
+            ngrams(word).forEach(function (gram) {
+                var list = gram.length > 1 ? grams : chars;
+                if (list.indexOf(gram) < 0) {
+                    list.push(gram);
+                }
+            });
+        });
+        if (!grams.length && !chars.length) {
+            return Promise.resolve([]);
+        }
+        // 두 글자 이상 단어가 있으면 2글자 색인으로 후보를 찾고, 한 글자 단어는 상품명으로 거름
+        // (1글자 색인은 상위 상품만 있어 교집합에 쓰면 결과가 빠질 수 있음)
+        var lookups = grams.length
+            ? grams.map(function (gram) { return lookup(termFile(gram), gram); })
+            : [lookup(unigramFile(chars[0]), chars[0])];
+        return Promise.all(lookups).then(function (lists) {
+            var ids = intersect(lists);
+            var docNames = {};
+            ids.forEach(function (id) { docNames['d-' + docShard(id) + '.json'] = true; });
+            return Promise.all(Object.keys(docNames).map(fetchJson)).then(function (shards) {
+                var docs = {};
+                shards.forEach(function (shard) {
+                    Object.keys(shard).forEach(function (id) { docs[id] = shard[id]; });
+                });
+                return ids.filter(function (id) {
+                    if (!docs[id]) {
+                        return false;
+                    }
+                    var name = tokenize(docs[id][0]).join(' ');
+                    return chars.every(function (char) { return name.indexOf(char) >= 0; });
+                }).map(function (id) {
+                    return docs[id];
+                }).sort(function (a, b) { return (b[2] || 0) - (a[2] || 0); });
+            });
+        });
+    }
+
+    function escapeHtml(value) {
+        return String(value == null ? '' : value).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+
+    function renderCard(doc) {
+        var name = escapeHtml(doc[0]);
+        var price = Math.round(doc[1] || 0).toLocaleString('ko-KR');
+        var badge = doc[2] > 0 ? '<span class="discount-badge">' + Math.round(doc[2]) + '% OFF</span>' : '';
+        return '<div class="product-card">' + badge +
+            '<a href="' + escapeHtml(doc[3]) + '" target="_blank" rel="noopener sponsored">' +
+            '<img src="' + escapeHtml(doc[4]) + '" alt="' + name + '" loading="lazy">' +
+            '<div class="product-info"><div class="product-name">' + name + '</div>' +
+            '<div class="product-price-container"><span class="sale-price">' + price + '원</span></div>' +
+            '</div></a></div>';
+    }
+
+    function init() {
+        var input = document.getElementById('search-input');
+        var status = document.getElementById('search-status');
+        var results = document.getElementById('search-results');
+        if (!input) {
+            return;
+        }
+        var pending = 0;
+
+        function run() {
+            var ticket = ++pending;
+            var query = input.value;
+            search(query).then(function (docs) {
+                if (ticket !== pending) {
+                    return;
+                }
+                // 한 글자 검색은 할인율 상위 상품만 색인되어 있으므로 개수에 '+' 표시
+                var capped = docs.length >= meta.unigram_limit && tokenize(query).every(function (word) {
+                    return word.length === 1;
+                });
+                status.textContent = query.trim() ? docs.length + (capped ? '+' : '') + '개 상품' : '';
+                results.innerHTML = docs.slice(0, MAX_RESULTS).map(renderCard).join('');
+            });
+        }
+
+        fetchJson('meta.json').then(function (data) {
+            if (data.version !== INDEX_VERSION) {
+                status.textContent = '검색 색인을 불러오지 못했습니다.';
+                return;
+            }
+            meta = data;
+            var timer = null;
+            input.addEventListener('input', function () {
+                clearTimeout(timer);
+                timer = setTimeout(run, 150);
+            });
+            var initial = new URLSearchParams(location.search).get('q');
+            if (initial) {
+                input.value = initial;
+                run();
+            }
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', init);
+})();
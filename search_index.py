@@ -0,0 +1,174 @@
+"""
+정적 사이트용 상품 검색 색인
+상품명을 한글 친화적인 글자 n-gram(1글자 + 2글자)으로 나눈 역색인을 만들고, 토큰 첫 글자(한글은 초성) 기준 샤드로 나눠
+docs/search/ 아래에 저장합니다. 브라우저(search.js)는 검색어에 필요한 샤드만 내려받습니다.
+샤드 내용이 지난 빌드와 같으면 파일을 다시 쓰지 않으므로 바뀐 상품이 속한 샤드만 갱신됩니다.
+
+상품 수가 늘어도 샤드 하나가 계속 커지지 않도록
+- 2글자 색인 샤드가 SEARCH_TERM_SHARD_POSTINGS를 넘으면 둘째 글자 기준으로 한 번 더 나누고
+- 상품 정보 샤드 수는 상품 수에 맞춰 정하며 (meta.json에 기록)
+- 1글자 색인은 별도 샤드에 글자마다 할인율 상위 SEARCH_UNIGRAM_LIMIT개만 둡니다
+  (한 글자 검색어는 결과가 너무 많아 어차피 상위 상품만 보이고, 다른 검색어와 함께 쓰이면 상품명으로 거름)
+
+search.js의 정규화/토큰화/샤드 계산은 이 모듈과 같은 규칙을 따라야 합니다.
+"""
+import os
+import re
+import json
+import unicodedata
+
+# docs/ 아래 검색 색인 디렉터리
+SEARCH_DIR = 'search'
+# 상품 정보(문서) 샤드 1개에 담을 상품 수 목표 (샤드 수는 2의 거듭제곱으로 올림, 최소 DOC_SHARDS_MIN)
+DOC_SHARD_SIZE = int(os.getenv('SEARCH_DOC_SHARD_SIZE', '500'))
+DOC_SHARDS_MIN = int(os.getenv('SEARCH_DOC_SHARDS', '16'))
+# 2글자 색인 샤드 1개의 최대 ID 수 (넘으면 둘째 글자 기준으로 나눔)
+TERM_SHARD_POSTINGS = int(os.getenv('SEARCH_TERM_SHARD_POSTINGS', '20000'))
+# 1글자 색인에 글자마다 남기는 상품 수 (할인율 상위)
+UNIGRAM_LIMIT = int(os.getenv('SEARCH_UNIGRAM_LIMIT', '100'))
+# 색인 형식 버전 (search.js가 다른 버전을 받으면 검색 비활성화)
+INDEX_VERSION = 2
+
+TOKEN_PATTERN = re.compile(r'[0-9a-z가-힣]+')
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG_SPAN = 21 * 28
+
+
+def normalize_text(text):
+    """NFKC 정규화 + 소문자 변환"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text):
+    """영문/숫자/완성형 한글 단어 목록"""
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+
+def ngrams(word, n=2):
+    """단어의 글자 n-gram (n보다 짧은 단어는 단어 그대로)"""
+    if len(word) <= n:
+        return [word]
+    return [word[i:i + n] for i in range(len(word) - n + 1)]
+
+
+def shard_key(gram):
+    """색인 샤드 이름 (한글은 첫 글자의 초성 번호 h00~h18, 영문/숫자는 첫 글자)"""
+    code = ord(gram[0])
+    if HANGUL_BASE <= code <= HANGUL_LAST:
+        return f"h{(code - HANGUL_BASE) // CHOSEONG_SPAN:02d}"
+    return gram[0]
+
+
+def doc_shard_count(product_count):
+    """상품 수에 맞춘 상품 정보 샤드 수 (2의 거듭제곱이라 상품 수가 조금 바뀌어도 샤드 배치가 유지됨)"""
+    shards = DOC_SHARDS_MIN
+    while shards * DOC_SHARD_SIZE < product_count:
+        shards *= 2
+    return shards
+
+
+def doc_shard(product_id, shards):
+    """상품 정보 샤드 번호 (search.js와 같은 계산: 32비트 h * 31 + 글자 코드 해시)"""
+    h = 0
+    for c in str(product_id):
+        h = (h * 31 + ord(c)) & 0xFFFFFFFF
+    return h % shards
+
+
+def build_search_index(products, shards):
+    """
+    {상품 ID: 레코드}로 (2글자 색인 샤드, 1글자 색인 샤드, 문서 샤드) 생성
+    - 2글자 색인 샤드: {gram: [상품 ID, ...]} (ID 정렬, 중복 없음, 큰 샤드는 둘째 글자로 나눈 키 '첫-둘째')
+    - 1글자 색인 샤드: {글자: [상품 ID, ...]} (할인율 높은 순 UNIGRAM_LIMIT개)
+    - 문서 샤드: {상품 ID: [상품명, 판매가, 할인율, 상품 URL, 이미지]}
+    """
+    term_postings = {}
+    unigram_postings = {}
+    doc_shards = {}
+    for product_id, record in products.items():
+        product_id = str(product_id)
+        grams = set()
+        chars = set()
+        for word in tokenize(record.get('productName')):
+            # 2-gram은 두 글자 이상 검색어용, 1-gram은 한 글자 검색어(예: '폰')용
+            grams.update(gram for gram in ngrams(word) if len(gram) > 1)
+            chars.update(word)
+        for gram in grams:
+            term_postings.setdefault(gram, []).append(product_id)
+        for char in chars:
+            unigram_postings.setdefault(char, []).append(product_id)
+        doc_shards.setdefault(doc_shard(product_id, shards), {})[product_id] = [
+            record.get('productName'), record.get('salePrice'), record.get('discountRate'),
+            record.get('productUrl'), record.get('productImage'),
+        ]
+
+    sizes = {}
+    for gram, ids in term_postings.items():
+        ids.sort()
+        key = shard_key(gram)
+        sizes[key] = sizes.get(key, 0) + len(ids)
+    split_keys = {key for key, size in sizes.items() if size > TERM_SHARD_POSTINGS}
+    term_shards = {}
+    for gram, ids in term_postings.items():
+        key = shard_key(gram)
+        if key in split_keys:
+            key = f"{key}-{shard_key(gram[1])}"
+        term_shards.setdefault(key, {})[gram] = ids
+
+    def discount_order(product_id):
+        return (-(products[product_id].get('discountRate') or 0), product_id)
+
+    unigram_shards = {}
+    for char, ids in unigram_postings.items():
+        ids.sort(key=discount_order)
+        unigram_shards.setdefault(shard_key(char), {})[char] = ids[:UNIGRAM_LIMIT]
+    return term_shards, unigram_shards, doc_shards, sorted(split_keys)
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def write_search_index(output_dir, products, manifest, shards=None):
+    """
+    검색 색인을 output_dir/search/에 저장하고 통계 반환
+    내용이 바뀐 샤드만 쓰고(manifest.write_page), 더 이상 쓰지 않는 샤드 파일은 삭제
+    shards: 상품 정보 샤드 수 (None이면 상품 수에 맞춰 결정)
+    """
+    index_dir = os.path.join(output_dir, SEARCH_DIR)
+    products = {str(product_id): record for product_id, record in products.items()}
+    if shards is None:
+        shards = doc_shard_count(len(products))
+    term_shards, unigram_shards, doc_shards, split_keys = build_search_index(products, shards)
+
+    files = {}
+    for key, postings in term_shards.items():
+        files[f"t-{key}.json"] = _dump(postings)
+    for key, postings in unigram_shards.items():
+        files[f"u-{key}.json"] = _dump(postings)
+    for number, docs in doc_shards.items():
+        files[f"d-{number}.json"] = _dump(docs)
+    files['meta.json'] = _dump({
+        'version': INDEX_VERSION,
+        'doc_shards': shards,
+        'term_shards': sorted(term_shards),
+        'split_shards': split_keys,
+        'unigram_shards': sorted(unigram_shards),
+        'unigram_limit': UNIGRAM_LIMIT,
+        'products': len(products),
+    })
+
+    stats = {'shards': len(files), 'written': 0, 'unchanged': 0, 'removed': 0,
+             'largest_kb': round(max(len(content.encode('utf-8')) for content in files.values()) / 1024, 1)}
+    for name, content in files.items():
+        if manifest.write_page(os.path.join(index_dir, name), content):
+            stats['written'] += 1
+        else:
+            stats['unchanged'] += 1
+
+    for name in os.listdir(index_dir):
+        if name.endswith('.json') and name not in files:
+            os.remove(os.path.join(index_dir, name))
+            stats['removed'] += 1
+    return stats
@@ -0,0 +1,356 @@
+"""
+로컬 미리보기 서버
+지난 빌드가 남긴 상품 피드(docs/feeds/)를 한 번만 읽어 두고, 요청이 오면 make_html과 같은 함수로
+index.html / category.html / events.html / 카테고리·기획전 페이지를 그때그때 렌더링합니다.
+API를 호출하지 않으므로 template.html을 고친 결과를 전체 빌드 없이 바로 확인할 수 있습니다.
+
+렌더링한 페이지는 LRU 페이지 캐시에 보관하고, 요청마다 template.html과 feeds/index.json의 변경 여부만 확인합니다.
+- template.html이 바뀌면: 템플릿을 다시 컴파일하고 페이지 캐시 전체 무효화
+- 피드가 바뀌면 (새 빌드): 피드를 다시 읽고 HTML 페이지(빌드 시각 표시)와 내용이 바뀐 피드의 상품 조각만 무효화
+
+피드 행의 역대 최저가 여부(isAllTimeLow)는 빌드 시점의 가격 기록으로 판정된 값을 그대로 사용합니다.
+
+    python serve.py [--port 8000] [--output-dir ./docs]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from template_renderer import load_template
+from feeds import FEED_DIR, load_feed_state
+from make_html import (
+    ALL_CATEGORIES, TOP_CATEGORIES, CATEGORY_PAGE_SIZE, CHUNK_DIR, JUST_DROPPED_LIMIT,
+    PAGE_REQUIRED_SLOTS, PAGE_OPTIONAL_SLOTS, render_cards, chunk_json, category_page_html,
+    hub_link_html, hub_page_html, category_section_html, index_page_html, search_page_html,
+)
+
+# 페이지 캐시에 보관할 최대 응답 수 (카테고리/기획전 페이지 + 상품 조각)
+SERVE_CACHE_SIZE = int(os.getenv('SERVE_CACHE_SIZE', '128'))
+# 저장소 루트 (template.html / 정적 js 위치)
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# docs/를 거치지 않고 저장소 루트에서 바로 읽는 정적 파일 (수정 즉시 반영)
+LIVE_ASSETS = ('lazy_cards.js', 'search.js')
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+}
+
+PAGE_PATTERN = re.compile(r'([0-9A-Za-z_-]+)\.html')
+CHUNK_PATTERN = re.compile(rf'{CHUNK_DIR}/([0-9A-Za-z_-]+)-(\d+)\.json')
+
+
+def _file_signature(path):
+    """파일 변경 감지용 (수정 시각, 크기) - 파일이 없으면 None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PageCache:
+    """
+    경로 → (본문, Content-Type) LRU 캐시
+    항목마다 의존 대상(피드 이름, 'template', 'index')을 함께 기록해 바뀐 대상에 걸린 항목만 무효화
+    """
+
+    def __init__(self, max_entries=SERVE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evicted': 0, 'invalidated': 0}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0], entry[1]
+
+    def put(self, key, body, content_type, deps):
+        with self.lock:
+            self.entries[key] = (body, content_type, frozenset(deps))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def invalidate(self, deps):
+        """deps 중 하나라도 의존하는 항목 삭제 후 삭제 수 반환"""
+        deps = set(deps)
+        with self.lock:
+            keys = [key for key, entry in self.entries.items() if entry[2] & deps]
+            for key in keys:
+                del self.entries[key]
+            self.stats['invalidated'] += len(keys)
+        return len(keys)
+
+
+class SitePreview:
+    """피드 데이터 + 컴파일된 템플릿을 메모리에 들고 요청된 페이지를 렌더링"""
+
+    def __init__(self, output_dir='./docs', template_path=None, cache_size=SERVE_CACHE_SIZE):
+        self.output_dir = output_dir
+        self.template_path = template_path or os.path.join(ROOT_DIR, 'template.html')
+        self.index_path = os.path.join(output_dir, FEED_DIR, 'index.json')
+        self.cache = PageCache(cache_size)
+        self.reload_lock = threading.Lock()
+
+        self.page_template = None
+        self.template_signature = None
+        self.index_signature = None
+        self.feed_signatures = {}
+        self.index = {}
+        self.feeds = {}
+        self.products = {}
+        self.refresh()
+
+    def _load_feeds(self):
+        """피드를 다시 읽고 내용이 바뀐 피드 이름 반환"""
+        started = time.perf_counter()
+        index, feeds = load_feed_state(self.output_dir)
+        signatures = {name: _file_signature(os.path.join(self.output_dir, FEED_DIR, f"{name}.json"))
+                      for name in feeds}
+        changed = {name for name in set(signatures) | set(self.feed_signatures)
+                   if signatures.get(name) != self.feed_signatures.get(name)}
+
+        products = {}
+        for rows in feeds.values():
+            for product_id, row in rows.items():
+                products.setdefault(product_id, row)
+        self.index, self.feeds, self.products = index, feeds, products
+        self.feed_signatures = signatures
+        print(f"📦 피드 {len(feeds)}개 / 상품 {len(products)}개 로드 "
+              f"({(time.perf_counter() - started) * 1000:.0f}ms, 변경된 피드 {len(changed)}개)")
+        return changed
+
+    def refresh(self):
+        """template.html / 피드 변경 확인 (요청마다 호출, 파일 stat 2회)"""
+        template_signature = _file_signature(self.template_path)
+        index_signature = _file_signature(self.index_path)
+        if template_signature == self.template_signature and index_signature == self.index_signature:
+            return
+        with self.reload_lock:
+            if template_signature != self.template_signature:
+                try:
+                    self.page_template = load_template(self.template_path, PAGE_REQUIRED_SLOTS, PAGE_OPTIONAL_SLOTS)
+                except Exception as e:
+                    # 편집 중 잘못된 템플릿은 이전 템플릿으로 계속 서비스
+                    print(f"❌ 템플릿 컴파일 실패 (이전 템플릿 유지): {e}", file=sys.stderr)
+                    if self.page_template is None:
+                        raise
+                else:
+                    dropped = self.cache.invalidate({'template'})
+                    print(f"🎨 템플릿 다시 컴파일 (캐시 {dropped}개 무효화)")
+                self.template_signature = template_signature
+            if index_signature != self.index_signature:
+                changed = self._load_feeds()
+                dropped = self.cache.invalidate(changed | {'index'})
+                if dropped:
+                    print(f"  ↺ 페이지 캐시 {dropped}개 무효화")
+                self.index_signature = index_signature
+
+    def _update_time(self):
+        """피드를 만든 빌드 시각 (한국 시간)"""
+        try:
+            generated = datetime.fromisoformat(self.index['generated_at'])
+        except (KeyError, TypeError, ValueError):
+            return "-"
+        return (generated.replace(tzinfo=None) + timedelta(hours=9)).strftime('%Y년 %m월 %d일 %H시 %M분')
+
+    def _feed_title(self, name):
+        return self.index.get('feeds', {}).get(name, {}).get('title', name)
+
+    def _just_dropped(self):
+        """가장 최근 변경분(delta)에서 가격이 내린 상품 (인하율 순)"""
+        deltas = self.index.get('deltas') or []
+        if not deltas:
+            return []
+        try:
+            with open(os.path.join(self.output_dir, deltas[0]['url']), 'r', encoding='utf-8') as f:
+                delta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return []
+        dropped = [change for change in delta.get('repriced', [])
+                   if change.get('from') and change.get('to') is not None and change['to'] < change['from']]
+        dropped.sort(key=lambda change: change['to'] / change['from'])
+        records = [self.products.get(str(change['productId'])) for change in dropped[:JUST_DROPPED_LIMIT]]
+        return [record for record in records if record]
+
+    def _render_index(self):
+        top_slugs = [slug for _, slug in TOP_CATEGORIES.values()]
+        goldbox = list(self.feeds.get('goldbox', {}).values())
+        # 피드에는 베스트셀러 순위가 없으므로 첫 번째 TOP 카테고리 피드(할인율 순) 상위 10개로 대신함
+        bestseller = list(self.feeds.get(top_slugs[0], {}).values())[:10]
+        sections_html = "".join(
+            category_section_html(name, slug, render_cards(list(self.feeds[slug].values())[:5]))
+            for name, slug in TOP_CATEGORIES.values() if self.feeds.get(slug)
+        )
+        html = index_page_html(self.page_template, self._update_time(), render_cards(goldbox),
+                               render_cards(self._just_dropped()), render_cards(bestseller), sections_html)
+        return html, {'goldbox', *top_slugs}
+
+    def _render_category_hub(self):
+        links_html = "".join(hub_link_html(slug, name) for name, slug in ALL_CATEGORIES.values()
+                             if self.feeds.get(slug))
+        return hub_page_html(self.page_template, "카테고리 전체보기", "전체 카테고리",
+                             links_html, self._update_time()), set()
+
+    def _render_events_hub(self):
+        events = [name for name in self.index.get('feeds', {}) if name.startswith('event-') and name in self.feeds]
+        links_html = "".join(hub_link_html(name, f"{self._feed_title(name)} ({len(self.feeds[name])}개)")
+                             for name in events)
+        return hub_page_html(self.page_template, "진행 중인 기획전", "🎁 진행 중인 기획전",
+                             links_html or '<p>진행 중인 기획전이 없습니다.</p>', self._update_time()), set()
+
+    def _render_detail(self, slug):
+        records = list(self.feeds[slug].values())
+        first_page = records[:CATEGORY_PAGE_SIZE]
+        next_chunk = f"{CHUNK_DIR}/{slug}-2.json" if len(records) > CATEGORY_PAGE_SIZE else None
+        html = category_page_html(self.page_template, self._feed_title(slug), render_cards(first_page),
+                                  len(records) - len(first_page), next_chunk, self._update_time())
+        return html, {slug}
+
+    def _render_chunk(self, slug, number):
+        """상품 조각 N번 (2번부터, 빌드의 write_category_chunks와 같은 분할)"""
+        records = list(self.feeds[slug].values())
+        start = CATEGORY_PAGE_SIZE * (number - 1)
+        if number < 2 or start >= len(records):
+            return None
+        end = start + CATEGORY_PAGE_SIZE
+        next_name = f"{CHUNK_DIR}/{slug}-{number + 1}.json" if end < len(records) else None
+        return chunk_json(render_cards(records[start:end]), next_name), {slug}
+
+    def render(self, name):
+        """경로(docs/ 기준) → (본문 문자열, 의존 대상) - 렌더링 대상이 아니면 None"""
+        if name == 'index.html':
+            return self._render_index()
+        if name == 'category.html':
+            return self._render_category_hub()
+        if name == 'events.html':
+            return self._render_events_hub()
+        if name == 'search.html':
+            return search_page_html(self.page_template), set()
+        match = PAGE_PATTERN.fullmatch(name)
+        if match and match.group(1) in self.feeds and match.group(1) != 'goldbox':
+            return self._render_detail(match.group(1))
+        match = CHUNK_PATTERN.fullmatch(name)
+        if match and match.group(1) in self.feeds:
+            return self._render_chunk(match.group(1), int(match.group(2)))
+        return None
+
+    def get(self, name):
+        """
+        요청 경로의 (본문 bytes, Content-Type, 캐시 상태) - 없으면 None
+        페이지/상품 조각은 페이지 캐시를 거쳐 렌더링하고, 그 밖의 파일(검색 색인 등)은 docs/에서 그대로 읽음
+        """
+        self.refresh()
+        content_type = CONTENT_TYPES.get(os.path.splitext(name)[1], 'application/octet-stream')
+        cached = self.cache.get(name)
+        if cached is not None:
+            return cached[0], cached[1], 'hit'
+
+        rendered = self.render(name)
+        if rendered is not None:
+            text, deps = rendered
+            body = text.encode('utf-8')
+            # HTML 페이지는 템플릿과 빌드(index.json, 빌드 시각 표시)에도 의존, 상품 조각은 자기 피드에만 의존
+            if name.endswith('.html'):
+                deps = set(deps) | {'template', 'index'}
+            self.cache.put(name, body, content_type, deps)
+            return body, content_type, 'miss'
+
+        # 페이지/상품 조각은 지난 빌드 파일이 남아 있어도 현재 피드 기준으로만 제공
+        if name.endswith('.html') or CHUNK_PATTERN.fullmatch(name):
+            return None
+        if name in LIVE_ASSETS:
+            file_path = os.path.join(ROOT_DIR, name)
+        else:
+            # docs/ 밖의 파일은 제공하지 않음
+            root = os.path.realpath(self.output_dir)
+            file_path = os.path.realpath(os.path.join(root, name))
+            if not file_path.startswith(root + os.sep):
+                return None
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read(), content_type, 'static'
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    preview = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        started = time.perf_counter()
+        name = urlsplit(self.path).path.lstrip('/') or 'index.html'
+        try:
+            result = self.preview.get(name)
+        except Exception as e:
+            print(f"❌ {name} 렌더링 실패: {e}", file=sys.stderr)
+            result, status = None, 500
+        else:
+            status = 200 if result is not None else 404
+
+        if result is None:
+            body, content_type, cache_status = b'not found' if status == 404 else b'error', 'text/plain', '-'
+        else:
+            body, content_type, cache_status = result
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('X-Page-Cache', cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+        print(f"  {status} /{name} ({cache_status}, {(time.perf_counter() - started) * 1000:.1f}ms)")
+
+
+def create_preview_server(preview, host='127.0.0.1', port=8000):
+    handler = type('BoundPreviewHandler', (PreviewHandler,), {'preview': preview})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="빌드 결과(피드)로 페이지를 즉석 렌더링하는 로컬 미리보기 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--output-dir', default='./docs', help="make_html.py 빌드 결과 디렉터리 (feeds/ 포함)")
+    parser.add_argument('--cache-size', type=int, default=SERVE_CACHE_SIZE, help="페이지 캐시 최대 항목 수")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.output_dir, FEED_DIR, 'index.json')):
+        print(f"❌ {args.output_dir}/{FEED_DIR}/index.json이 없습니다. make_html.py로 한 번 빌드하세요.", file=sys.stderr)
+        sys.exit(1)
+
+    preview = SitePreview(args.output_dir, cache_size=args.cache_size)
+    server = create_preview_server(preview, args.host, args.port)
+    print(f"🖥 미리보기 서버: http://{args.host}:{server.server_address[1]}/ (Ctrl+C로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 페이지 캐시: {preview.cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+증분 사이트 빌드 도구
+페이지별 입력 해시와 상품 구성 해시를 빌드 매니페스트에 저장해,
+입력이 바뀐 페이지만 다시 렌더링하고 내용이 바뀐 파일만 원자적으로 씁니다.
+"""
+import os
+import json
+import hashlib
+import threading
+
+# 빌드 매니페스트 파일 (워크플로 캐시로 다음 실행에 전달)
+MANIFEST_FILE = os.getenv('BUILD_MANIFEST_FILE', '.cache/build_manifest.json')
+
+# 카드 렌더링 결과에 영향을 주는 상품 필드
+CARD_FIELDS = ('productId', 'productName', 'productUrl', 'productImage',
+               'originalPrice', 'salePrice', 'discountRate', 'isAllTimeLow')
+
+
+def hash_inputs(*parts):
+    """JSON으로 직렬화 가능한 입력들의 SHA-256 해시"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def product_set_fingerprint(items):
+    """페이지에 표시되는 상품 구성(순서 포함)과 가격 정보의 해시"""
+    return hash_inputs([[item.get(field) for field in CARD_FIELDS] for item in items])
+
+
+def write_atomic(file_path, content):
+    """임시 파일에 쓴 뒤 rename하여 반쯤 쓰인 파일이 배포되지 않도록 함"""
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
+
+
+class BuildManifest:
+    """
+    페이지별 입력/내용 해시와 카테고리별 상품 구성 해시를 기록하는 매니페스트
+    여러 렌더 워커가 동시에 사용할 수 있도록 내부 상태 갱신은 잠금으로 보호
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.pages = data.get('pages', {})
+        self.product_sets = data.get('product_sets', {})
+        self.stats = {'rendered': 0, 'skipped': 0, 'written': 0, 'unchanged': 0}
+        self.lock = threading.Lock()
+
+    def is_fresh(self, file_path, input_hash):
+        """입력이 지난 빌드와 같고 파일도 그대로 있으면 True (렌더링 생략 가능)"""
+        with self.lock:
+            entry = self.pages.get(file_path)
+        fresh = entry is not None and entry.get('input') == input_hash and os.path.exists(file_path)
+        if fresh:
+            with self.lock:
+                self.stats['skipped'] += 1
+        return fresh
+
+    def write_page(self, file_path, content, input_hash=None):
+        """내용이 바뀐 경우에만 원자적으로 쓰고, 실제로 썼으면 True"""
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self.lock:
+            entry = self.pages.get(file_path, {})
+        unchanged = entry.get('content') == content_hash and os.path.exists(file_path)
+        if not unchanged:
+            write_atomic(file_path, content)
+        with self.lock:
+            self.stats['rendered'] += 1
+            self.stats['written' if not unchanged else 'unchanged'] += 1
+            self.pages[file_path] = {'input': input_hash or content_hash, 'content': content_hash}
+        return not unchanged
+
+    def record_product_set(self, key, items):
+        """카테고리(섹션)별 상품 구성 해시 기록 후 반환"""
+        fingerprint = product_set_fingerprint(items)
+        with self.lock:
+            self.product_sets[key] = fingerprint
+        return fingerprint
+
+    def save(self):
+        """매니페스트 저장"""
+        data = {'pages': self.pages, 'product_sets': self.product_sets}
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True))
@@ -0,0 +1,67 @@
+"""
+template.html 사전 컴파일 렌더러
+템플릿을 한 번만 파싱해 고정 구간과 %%SLOT%% 이름 목록으로 나눠 두고,
+페이지마다 replace()를 반복하지 않고 한 번에 이어 붙여 렌더링합니다.
+"""
+import re
+
+SLOT_PATTERN = re.compile(r'%%([A-Z][A-Z0-9_]*)%%')
+
+
+class CompiledTemplate:
+    """
+    고정 구간(segments)과 슬롯 이름(slots)이 번갈아 오는 컴파일된 템플릿
+    segments[0] + slot[0] + segments[1] + ... + slot[n-1] + segments[n]
+    """
+
+    def __init__(self, source, required_slots, optional_slots=()):
+        self.source = source
+        self.required_slots = set(required_slots)
+        self.optional_slots = set(optional_slots)
+
+        self.segments = []
+        self.slots = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.segments.append(source[position:])
+
+        # 로드 시점에 알 수 없는/빠진 슬롯 검사
+        known_slots = self.required_slots | self.optional_slots
+        found_slots = set(self.slots)
+        unknown = sorted(found_slots - known_slots)
+        missing = sorted(self.required_slots - found_slots)
+        if unknown:
+            raise ValueError(f"템플릿에 알 수 없는 슬롯이 있습니다: {', '.join(unknown)}")
+        if missing:
+            raise ValueError(f"템플릿에 필수 슬롯이 없습니다: {', '.join(missing)}")
+        self.missing_optional = sorted(self.optional_slots - found_slots)
+
+    def render_parts(self, values):
+        """슬롯 값을 채운 조각 리스트 반환 (문서 전체를 중간에 복사하지 않음)"""
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            try:
+                parts.append(values[slot])
+            except KeyError:
+                if slot in self.required_slots:
+                    raise ValueError(f"필수 슬롯 값이 없습니다: {slot}")
+                parts.append('')
+            parts.append(segment)
+        return parts
+
+    def render(self, **values):
+        """한 번의 join으로 페이지 문자열 렌더링"""
+        return ''.join(self.render_parts(values))
+
+    def render_to(self, file, **values):
+        """파일 핸들에 조각 단위로 바로 기록"""
+        file.writelines(self.render_parts(values))
+
+
+def load_template(path, required_slots, optional_slots=()):
+    """템플릿 파일을 읽어 컴파일"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return CompiledTemplate(f.read(), required_slots, optional_slots)
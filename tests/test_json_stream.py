@@ -0,0 +1,76 @@
+"""json_stream 증분 파서: 응답을 어느 바이트 위치에서 잘라도 json.loads와 같은 결과가 나와야 함"""
+import json
+import unittest
+
+from json_stream import iter_json_items
+
+SAMPLE = {
+    'rCode': '0',
+    'rMessage': '',
+    'data': [
+        {'productId': 123, 'productName': '삼성 갤럭시 버즈 "프로"', 'salePrice': 1.5,
+         'originalPrice': 12e5, 'discountRate': -0.25, 'isRocket': True, 'isFreeShipping': False,
+         'categoryName': None, 'tags': ['a', {'b': [1, 2.25e-3]}]},
+        1.5, 1e5, -12, 0, 3.14159, -2.5E+10, 'ÿ😀', True, False, None, [], {},
+    ],
+    'total': 1234.5e-1,
+}
+
+
+def split_at(data, *offsets):
+    """data를 주어진 위치들에서 잘라 조각 목록으로"""
+    bounds = [0, *offsets, len(data)]
+    return [data[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+class IterJsonItemsTest(unittest.TestCase):
+
+    def assert_parses(self, chunks, expected):
+        meta = {}
+        items = list(iter_json_items(chunks, ('data',), meta))
+        self.assertEqual(items, expected['data'])
+        self.assertEqual(meta, {key: value for key, value in expected.items() if key != 'data'})
+
+    def test_whole_body(self):
+        self.assert_parses([json.dumps(SAMPLE).encode('utf-8')], SAMPLE)
+
+    def test_split_at_every_byte_offset(self):
+        for ensure_ascii in (True, False):
+            body = json.dumps(SAMPLE, ensure_ascii=ensure_ascii).encode('utf-8')
+            for offset in range(1, len(body)):
+                with self.subTest(ensure_ascii=ensure_ascii, offset=offset):
+                    self.assert_parses(split_at(body, offset), SAMPLE)
+
+    def test_one_byte_chunks(self):
+        body = json.dumps(SAMPLE, ensure_ascii=False).encode('utf-8')
+        self.assert_parses([body[i:i + 1] for i in range(len(body))], SAMPLE)
+
+    def test_numbers_split_inside(self):
+        for text in ('1.5', '1e5', '1E+5', '-1.25e-3', '12345', '-0.5', '0'):
+            body = f'{{"data": [{text}, {text}]}}'.encode('utf-8')
+            expected = {'data': [json.loads(text)] * 2}
+            for first in range(1, len(body)):
+                for second in range(first + 1, len(body)):
+                    with self.subTest(text=text, offsets=(first, second)):
+                        self.assert_parses(split_at(body, first, second), expected)
+
+    def test_truncated_body_raises(self):
+        body = json.dumps(SAMPLE).encode('utf-8')
+        for offset in (len(body) // 2, len(body) - 1):
+            with self.subTest(offset=offset):
+                with self.assertRaises(json.JSONDecodeError):
+                    list(iter_json_items([body[:offset]]))
+
+    def test_extra_data_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_items([b'{"data": [1]} x']))
+
+    def test_nested_path(self):
+        body = b'{"a": 1, "result": {"data": [1, 2], "n": 3}, "z": 4}'
+        meta = {}
+        self.assertEqual(list(iter_json_items([body], ('result', 'data'), meta)), [1, 2])
+        self.assertEqual(meta, {'a': 1, 'n': 3, 'z': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
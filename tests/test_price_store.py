@@ -0,0 +1,208 @@
+"""price_store: 세그먼트 병합/보존 정책/이관이 가격 기록을 잃거나 중복시키지 않아야 함"""
+import os
+import json
+import sqlite3
+import tempfile
+import unittest
+
+from price_store import PriceHistoryStore, RetentionPolicy, compact_segments
+
+DAY = 24 * 60 * 60
+
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'price_history.db')
+        self.segment_dir = os.path.join(self.tmp.name, 'price_segments')
+        os.makedirs(self.segment_dir)
+        self.store = PriceHistoryStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def write_segment(self, name, observations):
+        """(product_id, ts, price) 목록을 세그먼트 파일로 기록 (이름순 = 병합 순서)"""
+        with open(os.path.join(self.segment_dir, f"{name}.jsonl"), 'w', encoding='utf-8') as f:
+            for product_id, ts, price in observations:
+                f.write(json.dumps({'product_id': product_id, 'ts': ts, 'price': price}) + '\n')
+
+    def compact(self, **kwargs):
+        return compact_segments(self.store, segment_dir=self.segment_dir, **kwargs)
+
+    def record(self, product_id):
+        return self.store.load([product_id], {}).get(product_id)
+
+    def runs(self, product_id):
+        return self.store.conn.execute(
+            "SELECT price, first_seen, last_seen FROM price_runs WHERE product_id = ? ORDER BY first_seen",
+            (product_id,),
+        ).fetchall()
+
+
+class CompactSegmentsTest(StoreTestCase):
+
+    def test_compaction_is_idempotent(self):
+        self.write_segment('20260101T000000Z-a', [('1', 1000, 500.0), ('2', 1000, 900.0)])
+        self.write_segment('20260101T010000Z-b', [('1', 4600, 400.0), ('2', 4600, 900.0)])
+        first = self.compact()
+        self.assertEqual(first['segments_applied'], 2)
+        runs = {pid: self.runs(pid) for pid in ('1', '2')}
+        records = {pid: self.record(pid) for pid in ('1', '2')}
+
+        second = self.compact()
+        self.assertEqual(second['segments_applied'], 0)
+        self.assertEqual({pid: self.runs(pid) for pid in ('1', '2')}, runs)
+        self.assertEqual({pid: self.record(pid) for pid in ('1', '2')}, records)
+
+    def test_runs_are_run_length_encoded(self):
+        self.write_segment('20260101T000000Z-a', [('1', 1000, 500.0)])
+        self.write_segment('20260101T010000Z-b', [('1', 4600, 500.0)])
+        self.write_segment('20260101T020000Z-c', [('1', 8200, 450.0)])
+        self.write_segment('20260101T030000Z-d', [('1', 11800, 450.0)])
+        self.compact()
+        self.assertEqual(self.runs('1'), [(500.0, 1000, 4600), (450.0, 8200, 11800)])
+        record = self.record('1')
+        self.assertEqual((record['min_price'], record['min_ts']), (450.0, 8200))
+        self.assertEqual((record['last_price'], record['last_seen'], record['obs_count']), (450.0, 11800, 4))
+
+    def test_late_segment_updates_minimum_only(self):
+        self.write_segment('20260101T020000Z-b', [('1', 8200, 500.0)])
+        self.compact()
+        # 늦게 도착한 (이전 시각의) 세그먼트: 최저가/관측 횟수만 반영하고 마지막 가격은 유지
+        self.write_segment('20260101T010000Z-a', [('1', 4600, 300.0)])
+        report = self.compact()
+        self.assertEqual(report['segments_applied'], 1)
+        record = self.record('1')
+        self.assertEqual((record['min_price'], record['min_ts']), (300.0, 4600))
+        self.assertEqual((record['last_price'], record['last_seen'], record['obs_count']), (500.0, 8200, 2))
+        self.assertEqual(self.runs('1'), [(500.0, 8200, 8200)])
+
+    def test_out_of_order_observations_within_segment(self):
+        self.write_segment('20260101T000000Z-a', [('1', 8200, 450.0), ('1', 1000, 500.0), ('1', 4600, 500.0)])
+        self.compact()
+        record = self.record('1')
+        self.assertEqual((record['last_price'], record['last_seen']), (450.0, 8200))
+        self.assertEqual(record['min_price'], 450.0)
+
+    def test_prune_removes_applied_segments(self):
+        self.write_segment('20260101T000000Z-a', [('1', 1000, 500.0)])
+        report = self.compact(prune=True)
+        self.assertEqual(report['segments_pruned'], 1)
+        self.assertEqual(os.listdir(self.segment_dir), [])
+        self.assertEqual(self.record('1')['last_price'], 500.0)
+
+
+class RetentionTest(StoreTestCase):
+
+    def seed(self, product_id, observations):
+        self.store._import_observations([(product_id, observations)])
+
+    def test_evicts_products_not_seen_recently(self):
+        now = 100 * DAY
+        self.seed('old', [(now - 40 * DAY, 100.0)])
+        self.seed('new', [(now - 1 * DAY, 100.0)])
+        report = self.store.apply_retention(
+            RetentionPolicy(evict_after_days=30, downsample_after_days=0, max_products=0), now=now)
+        self.assertEqual(report['stale_evicted'], 1)
+        self.assertEqual(report['runs_removed'], 1)
+        self.assertIsNone(self.record('old'))
+        self.assertEqual(self.runs('old'), [])
+        self.assertIsNotNone(self.record('new'))
+
+    def test_max_products_evicts_least_recently_seen(self):
+        now = 100 * DAY
+        for i in range(5):
+            self.seed(str(i), [(now - (5 - i) * 3600, 100.0)])
+        report = self.store.apply_retention(
+            RetentionPolicy(evict_after_days=0, downsample_after_days=0, max_products=3), now=now)
+        self.assertEqual(report['lru_evicted'], 2)
+        self.assertEqual(self.store.count_products(), 3)
+        self.assertIsNone(self.record('0'))
+        self.assertIsNone(self.record('1'))
+        self.assertIsNotNone(self.record('2'))
+
+    def test_downsamples_old_runs_to_daily_minimum(self):
+        now = 100 * DAY
+        day = now - 20 * DAY
+        # 오래된 하루 안의 구간 3개 → 최저가 구간 1개, 최근 구간(마지막 구간 포함)은 그대로
+        self.seed('1', [(day, 500.0), (day + 3600, 400.0), (day + 7200, 450.0),
+                        (now - DAY, 480.0), (now - 3600, 470.0)])
+        report = self.store.apply_retention(
+            RetentionPolicy(evict_after_days=0, downsample_after_days=14, max_products=0), now=now)
+        self.assertEqual(report['runs_downsampled'], 2)
+        self.assertEqual(self.runs('1'), [(400.0, day, day + 7200), (480.0, now - DAY, now - DAY),
+                                          (470.0, now - 3600, now - 3600)])
+        # 집계 레코드(역대 최저가)는 다운샘플과 관계없이 유지
+        self.assertEqual(self.record('1')['min_price'], 400.0)
+
+    def test_downsampling_keeps_latest_run(self):
+        now = 100 * DAY
+        day = now - 20 * DAY
+        self.seed('1', [(day, 500.0), (day + 3600, 400.0)])
+        self.store.apply_retention(
+            RetentionPolicy(evict_after_days=0, downsample_after_days=14, max_products=0), now=now)
+        # 마지막 구간은 다음 관측 때 연장해야 하므로 병합하지 않음
+        self.assertEqual(self.runs('1'), [(500.0, day, day), (400.0, day + 3600, day + 3600)])
+
+
+class LegacyMigrationTest(StoreTestCase):
+
+    def write_json(self, data):
+        path = os.path.join(self.tmp.name, 'price_history.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.utime(path, (10 * DAY, 10 * DAY))
+        return path
+
+    def test_import_json(self):
+        path = self.write_json({'1': {'history': [500, 500, 400]}, '2': {'history': []}})
+        self.assertEqual(self.store.import_json(path), 1)
+        record = self.record('1')
+        self.assertEqual((record['min_price'], record['last_price'], record['obs_count']), (400.0, 400.0, 3))
+        self.assertEqual(record['last_seen'], 10 * DAY)
+        self.assertEqual(self.runs('1'), [(500.0, 10 * DAY - 7200, 10 * DAY - 3600), (400.0, 10 * DAY, 10 * DAY)])
+
+    def test_import_json_twice_is_refused(self):
+        path = self.write_json({'1': {'history': [500, 400]}})
+        self.store.import_json(path)
+        with self.assertRaises(ValueError):
+            self.store.import_json(path)
+        self.assertEqual(len(self.runs('1')), 2)
+
+    def test_import_json_into_store_with_history_is_refused(self):
+        self.write_segment('20260101T000000Z-a', [('1', 20 * DAY, 300.0)])
+        self.compact()
+        path = self.write_json({'1': {'history': [500, 400]}})
+        with self.assertRaises(ValueError):
+            self.store.import_json(path)
+        record = self.record('1')
+        self.assertEqual((record['last_price'], record['last_seen'], record['obs_count']), (300.0, 20 * DAY, 1))
+
+    def test_import_observations_skips_existing_products(self):
+        self.store._import_observations([('1', [(1000, 500.0), (4600, 400.0)])])
+        self.assertEqual(self.store._import_observations([('1', [(1000, 500.0)]), ('2', [(1000, 9.0)])]), 1)
+        self.assertEqual(self.runs('1'), [(500.0, 1000, 1000), (400.0, 4600, 4600)])
+
+    def test_migrates_raw_history_table(self):
+        self.store.close()
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("DROP TABLE products")
+        conn.execute("DROP TABLE price_runs")
+        conn.execute("CREATE TABLE price_history (product_id TEXT, ts INTEGER, price REAL)")
+        conn.executemany("INSERT INTO price_history VALUES (?, ?, ?)",
+                         [('1', 3000, 400.0), ('1', 1000, 500.0), ('1', 2000, 500.0), ('2', 1000, 10.0)])
+        conn.commit()
+        conn.close()
+
+        self.store = PriceHistoryStore(self.db_path)
+        self.assertEqual(self.store.count_products(), 2)
+        self.assertEqual(self.runs('1'), [(500.0, 1000, 2000), (400.0, 3000, 3000)])
+        self.assertIsNone(self.store.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='price_history'").fetchone())
+
+
+if __name__ == '__main__':
+    unittest.main()
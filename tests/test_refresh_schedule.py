@@ -0,0 +1,103 @@
+"""refresh_schedule: 가격 변경 빈도에 따라 카테고리 갱신 주기를 정하고 주기가 돌아온 카테고리만 조회해야 함"""
+import os
+import tempfile
+import unittest
+
+from price_store import PriceHistoryStore
+from refresh_schedule import (
+    RefreshScheduler, change_rate, refresh_interval,
+    REFRESH_MIN_HOURS, REFRESH_MAX_HOURS, REFRESH_TARGET_CHANGE,
+)
+
+HOUR = 60 * 60
+NOW = 1_800_000_000
+
+
+class IntervalTest(unittest.TestCase):
+
+    def test_change_rate(self):
+        # 상품 2개, 합계 10시간 동안 3회 변경 → 시간당 0.3회 (한 번만 관측된 상품은 제외)
+        stats = {'1': (2, 4 * HOUR), '2': (1, 6 * HOUR), '3': (0, 0)}
+        self.assertAlmostEqual(change_rate(stats), 0.3)
+        self.assertIsNone(change_rate({}))
+        self.assertIsNone(change_rate({'1': (0, 0)}))
+
+    def test_refresh_interval_bounds(self):
+        self.assertEqual(refresh_interval(None), REFRESH_MIN_HOURS)
+        self.assertEqual(refresh_interval(0), REFRESH_MAX_HOURS)
+        self.assertEqual(refresh_interval(1000), REFRESH_MIN_HOURS)
+        self.assertEqual(refresh_interval(1e-9), REFRESH_MAX_HOURS)
+        rate = REFRESH_TARGET_CHANGE / ((REFRESH_MIN_HOURS + REFRESH_MAX_HOURS) / 2)
+        self.assertAlmostEqual(refresh_interval(rate), (REFRESH_MIN_HOURS + REFRESH_MAX_HOURS) / 2)
+
+
+class RefreshSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PriceHistoryStore(os.path.join(self.tmp.name, 'price_history.db'))
+        self.path = os.path.join(self.tmp.name, 'refresh_schedule.json')
+        # 'volatile': 매시간 가격이 바뀌는 상품, 'stable': 하루 동안 가격이 그대로인 상품
+        self.store._import_observations(
+            [(f"v{i}", [(NOW - h * HOUR, 1000.0 + h % 2) for h in range(24)]) for i in range(3)]
+            + [(f"s{i}", [(NOW - h * HOUR, 1000.0) for h in range(24)]) for i in range(3)]
+        )
+        self.categories = {'volatile': ['v0', 'v1', 'v2'], 'stable': ['s0', 's1', 's2']}
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def scheduler(self, now):
+        return RefreshScheduler(self.store, path=self.path, now=now)
+
+    def fetch_all(self, now):
+        """모든 카테고리를 조회한 실행 기록 저장"""
+        scheduler = self.scheduler(now)
+        due, _ = scheduler.plan(self.categories)
+        for category_id in due:
+            scheduler.mark_fetched(category_id)
+        scheduler.save()
+        return scheduler
+
+    def test_first_run_fetches_everything(self):
+        due, reuse = self.scheduler(NOW).plan(self.categories)
+        self.assertEqual((due, reuse), (['volatile', 'stable'], []))
+
+    def test_intervals_follow_volatility(self):
+        scheduler = self.fetch_all(NOW)
+        self.assertEqual(scheduler.categories['volatile']['interval_hours'], REFRESH_MIN_HOURS)
+        self.assertEqual(scheduler.categories['stable']['interval_hours'], REFRESH_MAX_HOURS)
+        self.assertEqual(scheduler.next_due_hours('stable'), REFRESH_MAX_HOURS)
+
+    def test_only_due_categories_are_fetched(self):
+        self.fetch_all(NOW)
+        # 다음 정각 실행 (몇 분 일찍 시작해도 여유 시간 안이면 조회)
+        due, reuse = self.scheduler(NOW + HOUR - 5 * 60).plan(self.categories)
+        self.assertEqual((due, reuse), (['volatile'], ['stable']))
+        due, reuse = self.scheduler(NOW + REFRESH_MAX_HOURS * HOUR).plan(self.categories)
+        self.assertEqual((due, reuse), (['volatile', 'stable'], []))
+
+    def test_unfetched_category_stays_due(self):
+        scheduler = self.scheduler(NOW)
+        scheduler.plan(self.categories)
+        # 조회에 실패한 카테고리는 mark_fetched하지 않으므로 다음 실행에 다시 조회
+        scheduler.mark_fetched('volatile')
+        scheduler.save()
+        due, _ = self.scheduler(NOW + 10 * 60).plan(self.categories)
+        self.assertEqual(due, ['stable'])
+
+    def test_missing_previous_page_and_always_are_due(self):
+        self.fetch_all(NOW)
+        due, reuse = self.scheduler(NOW + 10 * 60).plan({'volatile': None, 'stable': ['s0']},
+                                                        always=('stable',))
+        self.assertEqual((due, reuse), (['volatile', 'stable'], []))
+
+    def test_schedule_with_other_version_is_ignored(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"version": 0, "categories": {"stable": {"last_fetch": %d}}}' % NOW)
+        self.assertEqual(self.scheduler(NOW).categories, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""run_snapshot: 지난 실행과 비교해 새 상품 / 가격 인하 / 인상 / 사라진 상품을 찾아야 함"""
+import os
+import json
+import tempfile
+import unittest
+
+from run_snapshot import build_snapshot, diff_snapshots, load_snapshot, save_snapshot
+
+
+class RunSnapshotTest(unittest.TestCase):
+
+    def test_build_snapshot_keeps_first_section(self):
+        snapshot = build_snapshot({
+            'goldbox': [{'productId': 1, 'salePrice': 1000}],
+            'digital': [{'productId': 1, 'salePrice': 1000}, {'productId': 2, 'salePrice': 500}],
+        })
+        self.assertEqual(snapshot, {'1': [1000, 'goldbox'], '2': [500, 'digital']})
+
+    def test_diff(self):
+        previous = {'1': [1000, 'a'], '2': [1000, 'a'], '3': [1000, 'a'], '4': [1000, 'a'],
+                    '5': [1000, 'a'], '6': [1000, 'a']}
+        current = {'1': [1000, 'b'], '2': [900, 'a'], '3': [500, 'a'], '4': [1100, 'a'],
+                   '5': [2000, 'a'], '7': [300, 'a']}
+        diff = diff_snapshots(previous, current)
+        self.assertEqual(diff['new'], ['7'])
+        self.assertEqual(diff['gone'], ['6'])
+        # 인하율/인상률이 큰 순 (섹션만 바뀐 상품은 변경 아님)
+        self.assertEqual(diff['dropped'], [('3', 1000, 500), ('2', 1000, 900)])
+        self.assertEqual(diff['rose'], [('5', 1000, 2000), ('4', 1000, 1100)])
+
+    def test_missing_prices_are_not_changes(self):
+        diff = diff_snapshots({'1': [None, 'a'], '2': [1000, 'a']}, {'1': [500, 'a'], '2': [None, 'a']})
+        self.assertEqual(diff, {'new': [], 'dropped': [], 'rose': [], 'gone': []})
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'run_snapshot.json')
+            self.assertIsNone(load_snapshot(path))
+            save_snapshot({'1': [1000, '디지털']}, path)
+            self.assertEqual(load_snapshot(path), {'1': [1000, '디지털']})
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'version': 0, 'products': {'1': [1000, 'a']}}, f)
+            self.assertIsNone(load_snapshot(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,166 @@
+"""CoupangApiHandler single-flight: 진행 중인 같은 요청은 한 번만 보내고, 끝난 요청의 결과는 붙잡아 두지 않아야 함"""
+import os
+import tempfile
+import threading
+import unittest
+
+os.environ.setdefault('COUPANG_ACCESS_KEY', 'test-access')
+os.environ.setdefault('COUPANG_SECRET_KEY', 'test-secret')
+os.environ.setdefault('COUPANG_CHANNEL_ID', 'test')
+
+from coupang_api import CoupangApiHandler, ApiRequestError
+from response_cache import ResponseCache
+
+REQUEST = ('GET', '/v2/providers/affiliate_open_api/apis/openapi/v1/products/goldbox', 'subId=test')
+
+
+class CountingLock:
+    """flights_lock 대용: 획득 횟수를 세어 호출자가 진행 중인 요청을 조회했는지 기다릴 수 있게 함"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.acquired = 0
+
+    def __enter__(self):
+        self.lock.acquire()
+        with self.cond:
+            self.acquired += 1
+            self.cond.notify_all()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+        return False
+
+    def wait_for(self, count, timeout=5):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.acquired >= count, timeout)
+
+
+class FakeApi:
+    """_iter_api_items 대용: 호출 횟수를 세고, release 전까지 응답이 끝나지 않음"""
+
+    def __init__(self, results):
+        # 호출 순서대로 (상품 목록, 성공 여부)
+        self.results = list(results)
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, method, path, query):
+        self.calls += 1
+        items, ok = self.results.pop(0)
+        self.started.set()
+        yield from (dict(item) for item in items)
+        self.release.wait(5)
+        return ok
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def make_handler(self, results, use_cache=False):
+        handler = CoupangApiHandler(use_cache=False)
+        if use_cache:
+            self.tmp = tempfile.TemporaryDirectory()
+            self.addCleanup(self.tmp.cleanup)
+            handler.cache = ResponseCache(cache_dir=self.tmp.name)
+        handler.flights_lock = CountingLock()
+        handler._iter_api_items = self.fake = FakeApi(results)
+        return handler
+
+    def run_concurrently(self, handler, followers, strict=False):
+        """리더 1개가 응답을 받는 중에 followers개 호출자가 같은 요청을 보내고 모두의 결과 반환"""
+        results = [None] * (followers + 1)
+        errors = []
+
+        def fetch(index):
+            try:
+                results[index] = list(handler._fetch_items(*REQUEST, strict=strict))
+            except Exception as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=fetch, args=(0,))
+        leader.start()
+        self.assertTrue(self.fake.started.wait(5))
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(1, followers + 1)]
+        for thread in threads:
+            thread.start()
+        # 모든 호출자가 진행 중인 요청을 찾은 뒤에 응답을 끝냄
+        self.assertTrue(handler.flights_lock.wait_for(1 + followers))
+        self.fake.release.set()
+        for thread in [leader] + threads:
+            thread.join(5)
+        return results, errors
+
+    def test_concurrent_requests_share_one_call(self):
+        items = [{'productId': 1, 'productName': 'a'}, {'productId': 2, 'productName': 'b'}]
+        handler = self.make_handler([(items, True)])
+        results, errors = self.run_concurrently(handler, followers=3)
+        self.assertEqual(errors, [])
+        self.assertEqual(self.fake.calls, 1)
+        self.assertEqual(results, [items] * 4)
+        self.assertEqual(handler.metrics.api_summary()['coalesced'], 3)
+
+    def test_followers_get_independent_copies(self):
+        handler = self.make_handler([([{'productId': 1, 'salePrice': 100}], True)])
+        results, _ = self.run_concurrently(handler, followers=2)
+        results[1][0]['salePrice'] = 1
+        self.assertEqual(results[0][0]['salePrice'], 100)
+        self.assertEqual(results[2][0]['salePrice'], 100)
+
+    def test_finished_request_is_not_retained(self):
+        handler = self.make_handler([([{'productId': 1}], True), ([{'productId': 1}], True)])
+        self.fake.release.set()
+        list(handler._fetch_items(*REQUEST))
+        self.assertEqual(handler.flights, {})
+        # 끝난 요청의 결과는 공유하지 않으므로 다음 호출은 새 요청 (캐시가 있으면 캐시 재생)
+        list(handler._fetch_items(*REQUEST))
+        self.assertEqual(self.fake.calls, 2)
+
+    def test_with_cache_items_are_not_kept_in_memory(self):
+        handler = self.make_handler([([{'productId': 1}], True), ([{'productId': 1}], True)], use_cache=True)
+        flights = []
+
+        def spy(method, path, query):
+            flights.append(handler.flights[(method, path, query)])
+            return (yield from self.fake(method, path, query))
+
+        handler._iter_api_items = spy
+        results, errors = self.run_concurrently(handler, followers=1)
+        self.assertEqual(errors, [])
+        self.assertIsNone(flights[0].items)
+        # 기다리던 호출자는 응답 캐시에서 재생 (여기서는 가짜 API를 한 번 더 호출)
+        self.assertEqual(self.fake.calls, 2)
+        self.assertEqual(results, [[{'productId': 1}]] * 2)
+
+    def test_failed_request_is_retried_by_follower(self):
+        handler = self.make_handler([([], False), ([{'productId': 1}], True)])
+        results, errors = self.run_concurrently(handler, followers=1)
+        self.assertEqual(errors, [])
+        self.assertEqual(self.fake.calls, 2)
+        self.assertEqual(results[0], [])
+        self.assertEqual(results[1], [{'productId': 1}])
+
+    def test_strict_failure_raises(self):
+        handler = self.make_handler([([], False)])
+        self.fake.release.set()
+        with self.assertRaises(ApiRequestError):
+            list(handler._fetch_items(*REQUEST, strict=True))
+        self.assertEqual(handler.flights, {})
+
+    def test_abandoned_request_is_not_shared(self):
+        handler = self.make_handler([([{'productId': 1}, {'productId': 2}], True),
+                                     ([{'productId': 1}, {'productId': 2}], True)])
+        self.fake.release.set()
+        stream = handler._fetch_items(*REQUEST)
+        next(stream)
+        stream.close()
+        # 끝까지 읽지 않은 요청은 완료로 보지 않고 다음 호출이 새로 요청
+        self.assertEqual(handler.flights, {})
+        self.assertEqual(list(handler._fetch_items(*REQUEST)), [{'productId': 1}, {'productId': 2}])
+        self.assertEqual(self.fake.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()